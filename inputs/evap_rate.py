@@ -43,25 +43,10 @@ monzon_climate = {
     9: 20, 10: 15, 11: 10, 12: 6
 }
 
-# --- FUNCIONES AUXILIARES ---
-
-def rn_from_rs(rs_wm2, albedo=ALBEDO, k_lw=K_LW):
-    if pd.isna(rs_wm2):
-        return np.nan
-    return max(0.0, k_lw * (1.0 - albedo) * float(rs_wm2))
-
-def get_temp_kelvin(row):
-    """Devuelve la temperatura en Kelvin con fallback jerárquico:
-       1) predicción diaria
-       2) climatología mensual
-       3) valor fijo definido arriba
-    """
-    if pd.notna(row["daily_t_mean"]):
-        return 273.15 + float(row["daily_t_mean"])
-    month = row["date"].month
-    if month in monzon_climate:
-        return 273.15 + monzon_climate[month]
-    return float(temp)
+# Climatología como LUT indexada por mes (1..12) para el fallback vectorizado
+monzon_climate_lut = np.full(13, np.nan)
+for _m, _v in monzon_climate.items():
+    monzon_climate_lut[_m] = _v
 
 
 # --- RADIACIÓN: DIARIA Y MENSUAL ---
@@ -79,7 +64,7 @@ elif "Rs_Wm2" not in df_daily.columns:
 
 # Asegurar columna date
 df_daily = df_daily.rename(columns={"Fecha": "date"})
-df_daily["date"] = pd.to_datetime(df_daily["date"], errors="raise").dt.normalize()
+df_daily["date"] = pd.to_datetime(df_daily["date"], format="%Y-%m-%d", errors="raise").dt.normalize()
 df_daily = df_daily.sort_values("date")
 
 print("Radiación diaria:", df_daily["date"].min().date(), "→", df_daily["date"].max().date())
@@ -104,19 +89,13 @@ month_map = dict(zip(df_month["mes"], df_month["radiacion_wm2"]))
 
 print("Radiación mensual cargada (mes → valor):", month_map)
 
-# Calendario completo
+# Calendario completo: reindex sobre un DatetimeIndex y relleno mensual,
+# sin DataFrame intermedio ni columna auxiliar de mes
 start = df_daily["date"].min().normalize()
-calendar = pd.DataFrame({"date": pd.date_range(start=start, periods=365, freq="D")})
-
-df = calendar.merge(df_daily[["date", "Rs_Wm2"]], on="date", how="left")
-
-# Rellenar huecos con media mensual
-df["Mes"] = df["date"].dt.month
-df["Rs_Wm2"] = df.apply(
-    lambda r: month_map.get(int(r["Mes"])) if pd.isna(r["Rs_Wm2"]) and int(r["Mes"]) in month_map else r["Rs_Wm2"],
-    axis=1
-)
-df["Rs_Wm2"] = pd.to_numeric(df["Rs_Wm2"], errors="coerce")
+idx = pd.date_range(start=start, periods=365, freq="D", name="date")
+rs = pd.to_numeric(df_daily.set_index("date")["Rs_Wm2"], errors="coerce").reindex(idx)
+monthly_rs = pd.Series(idx.month.map(month_map).astype(float), index=idx)
+df = rs.fillna(monthly_rs).to_frame("Rs_Wm2").reset_index()
 
 
 # --- TEMPERATURA: PREDICCIÓN AEMET (Monzón, 7 días) ---
@@ -129,13 +108,17 @@ temp_df = pd.read_csv(TEMP_CSV, sep=",", encoding="utf-8")
 if "date" not in temp_df.columns or "daily_t_mean" not in temp_df.columns:
     raise ValueError("El CSV debe contener columnas 'date' y 'daily_t_mean'.")
 
-temp_df["date"] = pd.to_datetime(temp_df["date"], errors="coerce").dt.normalize()
+temp_df["date"] = pd.to_datetime(temp_df["date"], format="%Y-%m-%d", errors="coerce").dt.normalize()
 
-# Unimos directamente con el DataFrame principal
-df = df.merge(temp_df[["date", "daily_t_mean"]], on="date", how="left")
+# Unimos directamente con el DataFrame principal (map, sin merge)
+df["daily_t_mean"] = df["date"].map(temp_df.set_index("date")["daily_t_mean"])
 
-# Aplicamos fallback jerárquico
-df["T_k"] = df.apply(get_temp_kelvin, axis=1)
+# Fallback jerárquico vectorizado: predicción diaria > climatología mensual > valor fijo
+months = df["date"].dt.month.to_numpy()
+daily = df["daily_t_mean"].to_numpy(dtype=np.float64)
+clim_t = monzon_climate_lut[months]
+t_c = np.where(~np.isnan(daily), daily, np.where(~np.isnan(clim_t), clim_t, temp - 273.15))
+df["T_k"] = t_c + 273.15
 
 print("Primeras filas con radiación + temperatura integrada:")
 print(df[["date", "Rs_Wm2", "daily_t_mean", "T_k"]].head(10).to_string(index=False))
@@ -146,16 +129,52 @@ print(f"Días sin predicción (rellenados con clima mensual o valor fijo): {n_mi
 
 # --- CÁLCULOS DE EVAPORACIÓN ---
 
-df["Rn_Wm2"] = df["Rs_Wm2"].apply(rn_from_rs)
-
-T_k = df["T_k"].astype(float)
-delta = (p/760.0) * (5336.0 / (T_k**2)) * np.exp(21.07 - (5336.0 / T_k))
+try:
+    import numexpr as ne
+except ImportError:
+    ne = None  # fallback a NumPy puro
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def compute_erate(T, Rn, p, hvap, gam):
+        """Kernel elementwise fusionado para horizontes largos (multianuales)."""
+        out = np.empty_like(T)
+        for i in prange(T.size):
+            inv = 1.0 / T[i]
+            d = (p / 760.0) * 5336.0 * inv * inv * np.exp(21.07 - 5336.0 * inv)
+            out[i] = (d * Rn[i]) / (hvap * (d + gam))
+        return out
+
+# Rn = K_LW(1-albedo)Rs, vectorizado sobre la columna completa (NaN se propaga)
+rs = df["Rs_Wm2"].to_numpy(dtype=np.float64)
+df["Rn_Wm2"] = np.maximum(0.0, K_LW * (1.0 - ALBEDO) * rs)
+
+# Todo el cálculo sobre ndarrays (sin alineación de índices de pandas)
+T_k = df["T_k"].to_numpy(dtype=np.float64)
+rn = df["Rn_Wm2"].to_numpy(dtype=np.float64)
+inv_T = 1.0 / T_k
 gam   = 0.0016286 * p / hvap
 
-df["erate_kg_m2_s"] = (delta * df["Rn_Wm2"]) / (hvap * (delta + gam))
+if njit is not None and T_k.size > 366:
+    # El coste de JIT solo compensa más allá de un año de horizonte
+    erate = compute_erate(T_k, rn, p, hvap, gam)
+elif ne is not None:
+    # Expresiones fusionadas: un solo pase por la memoria para cada resultado
+    delta = ne.evaluate("(p/760.0) * 5336.0 * inv_T * inv_T * exp(21.07 - 5336.0 * inv_T)")
+    erate = ne.evaluate("(delta * rn) / (hvap * (delta + gam))")
+else:
+    delta = (p/760.0) * 5336.0 * inv_T * inv_T * np.exp(21.07 - 5336.0 * inv_T)
+    erate = (delta * rn) / (hvap * (delta + gam))
+
+df["erate_kg_m2_s"] = erate
 
 # Tasa molar mol/(día·L)
-df["evap_mol_day_L"] = (df["erate_kg_m2_s"] * 86400.0) / (1000.0 * M_H2O)
+df["evap_mol_day_L"] = erate * (86400.0 / (1000.0 * M_H2O))
 
 print("Evaporación (mol/día·L):", float(df["evap_mol_day_L"].min()), "→", float(df["evap_mol_day_L"].max()))
 
@@ -171,7 +190,16 @@ df_out = pd.DataFrame({
 })
 
 # Guardar con 3 decimales en todos los valores flotantes
-df_out.to_csv(OUT_CSV, index=False, float_format="%.3f")
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    # Escritor C++ de Arrow; el redondeo sustituye a float_format="%.3f"
+    float_cols = df_out.columns.drop("date")
+    df_out[float_cols] = df_out[float_cols].round(3)
+    pa_csv.write_csv(pa.Table.from_pandas(df_out, preserve_index=False), OUT_CSV)
+except ImportError:
+    df_out.to_csv(OUT_CSV, index=False, float_format="%.3f")
 
 print(f"CSV creado: {OUT_CSV} (filas={len(df_out)})")
 print(df_out.head(10).to_string(index=False))
\ No newline at end of file
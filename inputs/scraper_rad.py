@@ -9,13 +9,16 @@ Web scraper del pronóstico del valor diario de radiación para los próximos 15
 """
 
 from playwright.sync_api import sync_playwright
-import csv
+import pandas as pd
 from datetime import datetime
-import locale
 from pathlib import Path
 
-# Forzar nombres de meses en español
-locale.setlocale(locale.LC_TIME, 'Spanish_Spain.1252')
+# Meses en español sin tocar el locale del proceso (portable a Linux/CI)
+MESES = {
+    "enero": 1, "febrero": 2, "marzo": 3, "abril": 4,
+    "mayo": 5, "junio": 6, "julio": 7, "agosto": 8,
+    "septiembre": 9, "octubre": 10, "noviembre": 11, "diciembre": 12,
+}
 
 URL = "https://www.tutiempo.net/radiacion-solar/monzon.html"
 
@@ -40,54 +43,52 @@ with sync_playwright() as p:
     page.wait_for_selector("div.diauv", timeout=10000)
     page.wait_for_timeout(3000)
 
-    bloques = page.query_selector_all("div.diauv")
+    # Una sola llamada JS devuelve todos los pares (fecha, valor): evita un
+    # round-trip al navegador por cada elemento
+    bloques = page.eval_on_selector_all(
+        "div.diauv",
+        "els => els.map(e => [e.querySelector('span')?.innerText || '',"
+        " e.querySelector('div.dayval')?.innerText || ''])",
+    )
     print(f"Número de bloques encontrados: {len(bloques)}")
 
     data = []
 
-    for i, b in enumerate(bloques):
+    for i, (fecha_raw, valor_raw) in enumerate(bloques):
         try:
-            print(f"\nBloque {i+1}:")
-            inner = b.inner_html()
-            print(inner[:300])  # imprimir solo los primeros caracteres
+            fecha_raw = fecha_raw.strip()
+            valor_raw = valor_raw.strip()
 
-            day_elem = b.query_selector("span")         # contiene la fecha
-            val_elem = b.query_selector("div.dayval")   # contiene el valor de radiación
-
-            if not day_elem:
+            if not fecha_raw:
                 print("Err: Elemento de fecha no encontrado.")
-            if not val_elem:
+            if not valor_raw:
                 print("Err: Elemento de radiación no encontrado.")
                 continue
 
-            fecha_raw = day_elem.text_content().strip()
-            valor_raw = val_elem.text_content().strip()
-
             print(f"Fecha: {fecha_raw}")
             print(f"Radiación: {valor_raw}")
 
             valor = int(valor_raw.split()[0])   # valor en Wh/m²
-            valor_W = valor / 24                # conversión a W/m² medios diarios
 
             # extraer la fecha completa
             año_actual = datetime.now().year
 
             try:
-                fecha_obj = datetime.strptime(f"{fecha_raw} {año_actual}", "%d de %B %Y")
-                fecha = fecha_obj.strftime("%Y-%m-%d")
-            except ValueError:
+                dia_str, mes_str = fecha_raw.lower().split(" de ")
+                fecha = f"{año_actual}-{MESES[mes_str.strip()]:02d}-{int(dia_str):02d}"
+            except (KeyError, ValueError):
                 fecha = fecha_raw
 
-            data.append((fecha, valor_W))  # ya convertido a W/m²
+            data.append((fecha, valor))  # Wh/m², se convierte en bloque al final
         except Exception as e:
             print(f"[!] Error en el bloque {i+1}: {e}")
 
     # guardar CSV si hay datos
     if data:
-        with open(OUT_CSV, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(["Fecha", "Radiacion_Wm2"])
-            writer.writerows(data)
+        df = pd.DataFrame(data, columns=["Fecha", "Radiacion_Wm2"])
+        # conversión a W/m² medios diarios: una división vectorizada
+        df["Radiacion_Wm2"] = df["Radiacion_Wm2"].astype(float) / 24.0
+        df.to_csv(OUT_CSV, index=False, float_format="%.3f", encoding="utf-8")
         print(f"\n✓ Archivo CSV guardado en: {OUT_CSV}")
     else:
         print("🛇 No se extrajo ningún dato.")
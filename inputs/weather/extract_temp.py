@@ -8,13 +8,14 @@ Created on Wed Aug  6 10:00:09 2025
 import numpy as np
 import pandas as pd
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 import re
 import datetime
 import pytz
-from io import StringIO
+from io import BytesIO, StringIO
 import os
-import xml.etree.ElementTree as ET
+from lxml import etree, html as lxml_html
 
 
 # LECTURA DE ESTACIONES DISPONIBLES AEMET
@@ -63,19 +64,22 @@ print(Stations_list.iloc[:, 0])
 
 # WEBSCRAPING DE DATOS METEOROLÓGICOS
 
-all_data = []  # lista vacía para acumular todas las estaciones
+# Sesión compartida (reutiliza conexiones TCP/TLS entre estaciones)
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=8))
+session.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=8))
 
-for i in range(len(Stations_list)):
-    req = requests.get(Stations_list["Link"][i])
-    soup = BeautifulSoup(req.text, "lxml")
 
-    table = soup.find_all("table")
-    df = pd.read_html(StringIO(str(table)))[0]
+def fetch_station(i: int) -> pd.DataFrame:
+    """Descarga y normaliza la tabla de observaciones de la estación i."""
+    req = session.get(Stations_list["Link"][i])
 
-    # Obtener coordenadas del HTML
-    coord = soup.find_all("abbr")
-    lat_text = coord[0].text
-    lon_text = coord[1].text
+    # Tabla directamente con pandas (parser lxml), sin reserializar el HTML
+    df = pd.read_html(StringIO(req.text), flavor="lxml")[0]
+
+    # Obtener coordenadas de los <abbr> vía XPath
+    tree = lxml_html.fromstring(req.text)
+    lat_text, lon_text = tree.xpath("//abbr/text()")[:2]
 
     lat_num = re.findall(r'\d+', lat_text)
     lon_num = re.findall(r'\d+', lon_text)
@@ -90,7 +94,7 @@ for i in range(len(Stations_list)):
     df["Longitude"] = lon_decimal
     df["Stations"] = Stations_list["Estaciones"][i] if "Estaciones" in Stations_list.columns else Stations_list.iloc[i, 0]
 
-    df["Fecha y hora oficial"] = pd.to_datetime(df["Fecha y hora oficial"], dayfirst=True, errors="coerce")
+    df["Fecha y hora oficial"] = pd.to_datetime(df["Fecha y hora oficial"], format="%d/%m/%Y %H:%M", errors="coerce")
     df = df.sort_values("Fecha y hora oficial")
 
     # --- Normalizar columnas ---
@@ -115,7 +119,12 @@ for i in range(len(Stations_list)):
     filename = os.path.join(OUTPUT_DIR, f"{i+1}_weather.csv")
     df.to_csv(filename, sep=";", index=False)
 
-    all_data.append(df)
+    return df
+
+
+# Descarga en paralelo: el cuello de botella es la red, no la CPU
+with ThreadPoolExecutor(max_workers=8) as ex:
+    all_data = list(ex.map(fetch_station, range(len(Stations_list))))
 
 # --- Concatenar todos los DataFrames al final ---
 if all_data:
@@ -136,58 +145,60 @@ data_final = data_inicial - datetime.timedelta(seconds=temps_calcul)
 
 # LECTURA Y FILTRADO DE CSVs POR ESTACIÓN
 
-data_AEMET_open = {}
-data_AEMET_none = {}
+# Componentes (u, v) por categoría de dirección del viento, como LUT de floats
+# alineada con WIND_KEYS (un gather vectorizado en lugar de lookups por fila)
+_M = np.sqrt(2) / 2
+WIND_KEYS = np.array([
+    '1-Calma', '2-Norte', '3-Nordeste', '4-Este', '5-Sudeste',
+    '6-Sur', '7-Sudoeste', '8-Oeste', '9-Noroeste',
+])
+WIND_UV = np.array([
+    [0.0, 0.0],   # Calma
+    [0.0, -1.0],  # Norte
+    [-_M, -_M],   # Nordeste
+    [-1.0, 0.0],  # Este
+    [-_M, _M],    # Sudeste
+    [0.0, 1.0],   # Sur
+    [_M, _M],     # Sudoeste
+    [1.0, 0.0],   # Oeste
+    [_M, -_M],    # Noroeste
+], dtype=np.float64)
+
+clean_frames = []
 
 for i in range(n_estacions_AEMET):
     data_path = os.path.join(OUTPUT_DIR, f"{i+1}_weather.csv")
-    data_AEMET_open[i + 1] = np.loadtxt(data_path, delimiter=";", skiprows=1, dtype=str)
-
-    n_rows = data_AEMET_open[i + 1].shape[0]
-    data_AEMET_none[i + 1] = np.empty((n_rows, 7), dtype=object)
-
-    for it in range(n_rows):
-        try:
-            fecha_hora = data_AEMET_open[i + 1][it, 0]
-            it_data = datetime.datetime.strptime(fecha_hora, '%Y-%m-%d %H:%M:%S').astimezone(spain_timezone)
-
-            if data_final - datetime.timedelta(minutes=30) <= it_data <= data_inicial:
-                print('here', it_data)
-                data_str = it_data.strftime("%Y-%m-%d %H:%M")
-
-                data_AEMET_none[i + 1][it, 0] = data_str
-                data_AEMET_none[i + 1][it, 1] = float(data_AEMET_open[i + 1][it, 11])  # Longitud
-                data_AEMET_none[i + 1][it, 2] = float(data_AEMET_open[i + 1][it, 10])  # Latitud
-
-                if data_AEMET_open[i + 1][it, 2] == '':
-                    data_AEMET_none[i + 1][it, 3:7] = [np.nan] * 4
-                else:
-                    v = float(data_AEMET_open[i + 1][it, 2])
-                    direction = data_AEMET_open[i + 1][it, 3]
-
-                    data_AEMET_none[i + 1][it, 3] = v
-                    data_AEMET_none[i + 1][it, 4] = direction
-
-                    wind_components = {
-                        '1-Calma':     (0, 0),
-                        '2-Norte':     (0, -1),
-                        '3-Nordeste':  (-np.sqrt(2)/2, -np.sqrt(2)/2),
-                        '4-Este':      (-1, 0),
-                        '5-Sudeste':   (-np.sqrt(2)/2, np.sqrt(2)/2),
-                        '6-Sur':       (0, 1),
-                        '7-Sudoeste':  (np.sqrt(2)/2, np.sqrt(2)/2),
-                        '8-Oeste':     (1, 0),
-                        '9-Noroeste':  (np.sqrt(2)/2, -np.sqrt(2)/2)
-                    }
-
-                    if direction in wind_components:
-                        u_factor, v_factor = wind_components[direction]
-                        data_AEMET_none[i + 1][it, 5] = u_factor * v
-                        data_AEMET_none[i + 1][it, 6] = v_factor * v
-                    else:
-                        data_AEMET_none[i + 1][it, 5:7] = [np.nan, np.nan]
-        except:
-            continue
+    d = pd.read_csv(data_path, sep=";")
+
+    d["date"] = pd.to_datetime(d["date"], format="%Y-%m-%d %H:%M:%S", errors="coerce")
+    d["date"] = d["date"].dt.tz_localize(spain_timezone, ambiguous="NaT", nonexistent="NaT")
+
+    # Ventana temporal de interés
+    window = (d["date"] >= data_final - datetime.timedelta(minutes=30)) & (d["date"] <= data_inicial)
+    d = d.loc[window]
+
+    # Componentes del viento: gather sobre la LUT vía códigos categóricos
+    codes = pd.Categorical(d["wind_dir"], categories=WIND_KEYS).codes
+    uv = np.where(codes[:, None] >= 0, WIND_UV[codes], np.nan)
+    v = pd.to_numeric(d["wind_vel_kmh"], errors="coerce").to_numpy(dtype=np.float32)
+
+    # Columnas tipadas (SoA): cada magnitud en su propio array compacto,
+    # nada de arrays 2-D de dtype object
+    clean_frames.append(pd.DataFrame({
+        "date": d["date"].dt.tz_localize(None).to_numpy(dtype="datetime64[m]"),
+        "longitude": d["longitude"].to_numpy(dtype=np.float32),
+        "latitude": d["latitude"].to_numpy(dtype=np.float32),
+        "wind_vel_kmh": v,
+        "wind_dir_code": codes.astype(np.int8),
+        "wind_u": (uv[:, 0] * v).astype(np.float32),
+        "wind_v": (uv[:, 1] * v).astype(np.float32),
+    }))
+
+# Un único concat al final: nunca acumular DataFrames dentro del bucle
+data_AEMET_clean = (
+    pd.concat(clean_frames, ignore_index=True, copy=False)
+    if clean_frames else pd.DataFrame()
+)
 
 
 # --- LECTURA DE PREDICCIÓN MUNICIPAL AEMET (Monzón, 7 días) ---
@@ -198,26 +209,25 @@ pred_file = os.path.join(OUTPUT_DIR, "monzon_7dias.csv")
 def get_daily_mean_from_aemet(xml_url):
     resp = requests.get(xml_url)
     resp.raise_for_status()
-    root = ET.fromstring(resp.content)
 
     records = []
-    for dia in root.findall(".//dia"):
-        fecha = dia.attrib.get("fecha")
-
-        # Extraer Tmax y Tmin
-        tmax = dia.findtext("temperatura/maxima")
-        tmin = dia.findtext("temperatura/minima")
+    # iterparse en streaming: se procesa cada <dia> y se libera al terminar,
+    # con lo que la memoria queda acotada también para series largas
+    for _, dia in etree.iterparse(BytesIO(resp.content), tag="dia"):
+        fecha = dia.get("fecha")
 
-        # Extraer temperaturas horarias (si existen)
-        hourly = [d.text for d in dia.findall("temperatura/dato") if d.text is not None]
+        # Temperaturas horarias (si existen): media en NumPy
+        hourly = dia.xpath("temperatura/dato/text()")
+        vals = np.fromiter((float(v) for v in hourly if v.strip() != ""), dtype=np.float64)
 
         tmean = None
-        if hourly:
-            vals = [float(v) for v in hourly if v.strip() != ""]
-            if vals:
-                tmean = sum(vals) / len(vals)
-        if tmean is None and tmax and tmin:
-            tmean = (float(tmax) + float(tmin)) / 2.0
+        if vals.size:
+            tmean = float(vals.mean())
+        else:
+            tmax = dia.findtext("temperatura/maxima")
+            tmin = dia.findtext("temperatura/minima")
+            if tmax and tmin:
+                tmean = (float(tmax) + float(tmin)) / 2.0
 
         if fecha and tmean is not None:
             records.append({
@@ -225,6 +235,11 @@ def get_daily_mean_from_aemet(xml_url):
                 "daily_t_mean": tmean
             })
 
+        # Liberar el subárbol ya consumido
+        dia.clear()
+        while dia.getprevious() is not None:
+            del dia.getparent()[0]
+
     return pd.DataFrame(records)
 
 # Generar CSV
@@ -4,8 +4,10 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import List, Optional
 
+import numpy as np
 
-@dataclass
+
+@dataclass(slots=True)
 class MineralProps:
     """Properties of a mineral phase for geochemical calculations.
     
@@ -22,13 +24,15 @@ class MineralProps:
     density_kg_m3: float
 
 
-@dataclass
+@dataclass(slots=True)
 class Pond:
     """Evaporation pond with physical dimensions and level tracking.
-    
+
     Represents a single pond in the cascade system, storing its physical
     properties and maintaining a history of liquid and solid levels over time.
-    
+    Histories are backed by preallocated NumPy buffers grown geometrically,
+    so long simulations avoid per-step boxed-float appends.
+
     Attributes:
         name: Pond identifier (e.g., 'P1', 'P2', etc.)
         area_m2: Surface area in square meters
@@ -41,21 +45,43 @@ class Pond:
     area_m2: float
     init_level_m: float
     max_level_m: float
-    level_history: list[float] = field(default_factory=list)
-    solids_level_history: list[float] = field(default_factory=list)
+    _liq_buf: np.ndarray = field(init=False, repr=False)
+    _sol_buf: np.ndarray = field(init=False, repr=False)
+    _n_records: int = field(init=False, repr=False, default=0)
+
+    _INITIAL_BUF_SIZE = 128
+
+    def __post_init__(self) -> None:
+        self._liq_buf = np.empty(self._INITIAL_BUF_SIZE, dtype=np.float32)
+        self._sol_buf = np.empty(self._INITIAL_BUF_SIZE, dtype=np.float32)
+
+    @property
+    def level_history(self) -> np.ndarray:
+        """Recorded liquid levels (meters) as a contiguous array view."""
+        return self._liq_buf[:self._n_records]
+
+    @property
+    def solids_level_history(self) -> np.ndarray:
+        """Recorded solid levels (meters) as a contiguous array view."""
+        return self._sol_buf[:self._n_records]
 
     def record_levels(self, liquid_level: float, solids_level: float) -> None:
         """Record liquid and solid levels for this time step.
-        
+
         Args:
             liquid_level: Current liquid level in meters
             solids_level: Current accumulated solids level in meters
         """
-        self.level_history.append(liquid_level)
-        self.solids_level_history.append(solids_level)
+        if self._n_records == self._liq_buf.size:
+            # Geometric doubling keeps appends amortized O(1)
+            self._liq_buf = np.resize(self._liq_buf, self._liq_buf.size * 2)
+            self._sol_buf = np.resize(self._sol_buf, self._sol_buf.size * 2)
+        self._liq_buf[self._n_records] = liquid_level
+        self._sol_buf[self._n_records] = solids_level
+        self._n_records += 1
 
 
-@dataclass
+@dataclass(slots=True)
 class Brine:
     """Brine composition for PHREEQC geochemical modeling.
     
@@ -65,24 +91,25 @@ class Brine:
     Attributes:
         phreeqc_solution_lines: Raw PHREEQC SOLUTION block lines including
                                headers, ionic concentrations, pH, temperature, etc.
+                               Immutable: the block is read once and never edited.
     """
-    phreeqc_solution_lines: list[str]
+    phreeqc_solution_lines: tuple[str, ...]
 
     @classmethod
     def from_file(cls, path: Path) -> "Brine":
         """Load brine composition from a PHREEQC SOLUTION format file.
-        
+
         Args:
             path: Path to file containing PHREEQC SOLUTION block
-            
+
         Returns:
             Brine instance with loaded composition data
         """
         with open(path, "r", encoding="utf-8") as f:
-            return cls(phreeqc_solution_lines=f.readlines())
+            return cls(phreeqc_solution_lines=tuple(f.read().splitlines(keepends=True)))
 
 
-@dataclass
+@dataclass(slots=True)
 class SimulationParams:
     """Parameters controlling evaporation simulation behavior.
     
@@ -95,21 +122,33 @@ class SimulationParams:
         nsteps_default_days: Default simulation duration in days
         micro_steps_factor: Sub-daily time step multiplier for convergence (1 = daily steps)
         evap_schedule_mol_per_day_L: Optional seasonal evaporation schedule overriding
-                                   constant rate (365 values for daily variation)
+                                   constant rate (365 daily values; ndarray or
+                                   any float sequence)
         max_evap_step_mol_L: Optional cap on evaporation per PHREEQC step to prevent
                            convergence failures from excessive concentration jumps
         max_total_steps: Maximum PHREEQC steps to prevent runaway simulations
+        pond_capacities_m3: Optional pond capacity map {'pond1': m3, ...} used for
+                          transfer capping
+        transfer_policy: Policy applied when a transfer exceeds target capacity
+        initial_pond1_m3: Initial liquid volume in Pond 1 (cubic meters)
+        liquid_density_g_per_L: Brine density used for volume bookkeeping (g/L)
+        verbose: Whether to print per-barrier diagnostics during pipelines
     """
     evaporation_rate_mol_per_day_L: float
     level_limit_m: float
     nsteps_default_days: int = 100
     micro_steps_factor: int = 1
-    evap_schedule_mol_per_day_L: Optional[List[float]] = None
+    evap_schedule_mol_per_day_L: Optional[np.ndarray | List[float]] = None
     max_evap_step_mol_L: Optional[float] = None
     max_total_steps: int = 500
+    pond_capacities_m3: Optional[dict[str, float]] = None
+    transfer_policy: str = "discard_excess"
+    initial_pond1_m3: Optional[float] = None
+    liquid_density_g_per_L: float = 1000.0
+    verbose: bool = True
 
 
-@dataclass
+@dataclass(slots=True)
 class Plant:
     """Complete evaporation pond facility model.
     
@@ -126,20 +165,21 @@ class Plant:
     ponds: list[Pond]
     brine: Brine
     minerals: dict[str, MineralProps]
+    _ponds_by_name: dict[str, Pond] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._ponds_by_name = {p.name: p for p in self.ponds}
 
     def get_pond(self, name: str) -> Pond:
         """Retrieve a pond by name.
-        
+
         Args:
             name: Pond identifier (e.g., 'P1', 'P2')
-            
+
         Returns:
             Pond instance with matching name
-            
+
         Raises:
             KeyError: If pond name not found in facility
         """
-        for p in self.ponds:
-            if p.name == name:
-                return p
-        raise KeyError(name)
+        return self._ponds_by_name[name]
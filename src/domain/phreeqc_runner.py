@@ -1,11 +1,22 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import os
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 from typing import Iterable
 
+import numpy as np
+
 from src.workingTools import phreeqcModel
 
+try:
+    from phreeqpy.iphreeqc.phreeqc_dll import IPhreeqc
+except ImportError:
+    IPhreeqc = None
+
 
 @dataclass
 class PhreeqcJobSpec:
@@ -33,6 +44,183 @@ class PhreeqcJobSpec:
     save_phases_tag: str | None = None
 
 
+
+@dataclass
+class PhreeqcJobBatch:
+    """Column-oriented batch of PHREEQC jobs for large parameter sweeps.
+
+    SoA counterpart of ``list[PhreeqcJobSpec]``: per-job scalars live in
+    contiguous NumPy arrays and the equilibrium-phase lists are interned in a
+    shared table, so rendering thousands of jobs iterates packed columns
+    instead of chasing one Python object per job.
+
+    Attributes:
+        solution_lines: Shared SOLUTION block lines (first job's composition)
+        reaction_mols: Water mols to evaporate per job (float64)
+        reaction_steps: Reaction steps per job (int32)
+        eq_phases_idx: Per-job index into phases_table (int32)
+        phases_table: Deduplicated equilibrium-phase name lists
+        results_files: SELECTED_OUTPUT filename per job
+        save_solution_tags: Optional SAVE SOLUTION tag per job
+        save_phases_tags: Optional SAVE EQUILIBRIUM_PHASES tag per job
+    """
+    solution_lines: list[str]
+    reaction_mols: np.ndarray
+    reaction_steps: np.ndarray
+    eq_phases_idx: np.ndarray
+    phases_table: list[list[str]]
+    results_files: list[str]
+    save_solution_tags: list[str | None] = field(default_factory=list)
+    save_phases_tags: list[str | None] = field(default_factory=list)
+
+    @classmethod
+    def from_jobs(cls, jobs: Iterable[PhreeqcJobSpec]) -> "PhreeqcJobBatch":
+        """Pack an AoS job list into the columnar layout.
+
+        Args:
+            jobs: Job specifications in execution order
+
+        Returns:
+            Equivalent PhreeqcJobBatch
+        """
+        jobs = list(jobs)
+        phases_table: list[list[str]] = []
+        interned: dict[tuple[str, ...], int] = {}
+        idx = np.empty(len(jobs), dtype=np.int32)
+        for i, j in enumerate(jobs):
+            key = tuple(j.eq_phases)
+            if key not in interned:
+                interned[key] = len(phases_table)
+                phases_table.append(list(key))
+            idx[i] = interned[key]
+        return cls(
+            solution_lines=list(jobs[0].solution_lines) if jobs else [],
+            reaction_mols=np.array([j.reaction_mols for j in jobs], dtype=np.float64),
+            reaction_steps=np.array([j.reaction_steps for j in jobs], dtype=np.int32),
+            eq_phases_idx=idx,
+            phases_table=phases_table,
+            results_files=[j.results_file for j in jobs],
+            save_solution_tags=[j.save_solution_tag for j in jobs],
+            save_phases_tags=[j.save_phases_tag for j in jobs],
+        )
+
+
+# Limite de buffers por llamada a writev (IOV_MAX); 1024 es el valor POSIX
+# minimo garantizado si sysconf no lo expone
+try:
+    _IOV_MAX = os.sysconf("SC_IOV_MAX")
+    if _IOV_MAX <= 0:
+        _IOV_MAX = 1024
+except (AttributeError, OSError, ValueError):
+    _IOV_MAX = 1024
+
+
+def write_input_parts(path: Path, parts: list[str]) -> None:
+    """Write pre-assembled input sections to disk in few syscalls.
+
+    The fragments are encoded once and handed to ``os.writev`` on a raw fd,
+    skipping the TextIOWrapper/BufferedWriter layers (PHREEQC input is plain
+    ASCII). writev accepts at most IOV_MAX buffers per call and may write
+    fewer bytes than requested, so the fragment list is consumed in chunks
+    with short writes resumed where they stopped. Falls back to a joined
+    ``write_bytes`` where writev is missing.
+
+    Args:
+        path: Destination input file
+        parts: Input file fragments, in order
+    """
+    encoded = [p.encode("utf-8") for p in parts]
+    if not hasattr(os, "writev"):
+        path.write_bytes(b"".join(encoded))
+        return
+    fd = os.open(str(path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        pos = 0
+        while pos < len(encoded):
+            chunk = encoded[pos:pos + _IOV_MAX]
+            written = os.writev(fd, chunk)
+            # Avanza sobre los buffers escritos por completo; si la escritura
+            # quedo corta a mitad de un buffer, recorta y reintenta desde ahi
+            i = 0
+            while i < len(chunk) and written >= len(chunk[i]):
+                written -= len(chunk[i])
+                i += 1
+            if i < len(chunk) and written:
+                encoded[pos + i] = chunk[i][written:]
+            pos += i
+    finally:
+        os.close(fd)
+
+
+@lru_cache(maxsize=32)
+def _discover_phreeqc(root: Path) -> tuple[Path, Path]:
+    """Locate the PHREEQC binary and database under a workspace root.
+
+    Memoized by resolved root: batch runs and parameter sweeps construct many
+    runners over the same workspace, and the directory walk plus per-candidate
+    existence checks only need to happen once per process. Use
+    ``_discover_phreeqc.cache_clear()`` if the workspace changes on disk.
+
+    Args:
+        root: Resolved workspace root to search
+
+    Returns:
+        Tuple of (binary path, database path)
+
+    Raises:
+        FileNotFoundError: If PHREEQC binary or database cannot be found
+    """
+    bin_path: Path | None = None
+    db_path: Path | None = None
+
+    # Executable names by OS
+    bin_names = ["phreeqc", "phreeqc.exe", "phreeqc.bat"]
+
+    def _stat_ok(p: Path) -> bool:
+        # Un unico stat por candidato, sin normalizaciones extra de Path.exists
+        try:
+            os.stat(p)
+            return True
+        except OSError:
+            return False
+
+    # Look for folders like 'phreeqc-*'; scandir reutiliza el is_dir que ya
+    # devuelve getdents, sin un stat adicional por entrada
+    with os.scandir(root) as it:
+        candidates = sorted(
+            (e.path for e in it if e.name.lower().startswith("phreeqc") and e.is_dir()),
+        )
+
+    for d in map(Path, candidates):
+        # Try possible executables
+        for bn in bin_names:
+            candidate_bin = d / "bin" / bn
+            if not _stat_ok(candidate_bin):
+                continue
+
+            # Database priority
+            for name in ["phreeqc.dat", "pitzer.dat", "minteq.v4.dat", "llnl.dat"]:
+                candidate_db = d / "database" / name
+                if _stat_ok(candidate_db):
+                    bin_path = candidate_bin
+                    db_path = candidate_db
+                    break
+
+            if bin_path and db_path:
+                break
+
+        if bin_path and db_path:
+            break
+
+    if not (bin_path and db_path):
+        raise FileNotFoundError(
+            f"No se encontró PHREEQC bin/database bajo {root}. "
+            f"Esperaba phreeqc-*/bin/{{{', '.join(bin_names)}}} y database/*.dat"
+        )
+
+    return bin_path, db_path
+
+
 class PhreeqcRunner:
     """PHREEQC simulation executor for evaporation pond modeling.
 
@@ -46,6 +234,17 @@ class PhreeqcRunner:
         model: phreeqcModel instance configured with binary and database paths
     """
 
+    # Cabecera PHASES fija (pseudo-fase Water para evaporar), identica en
+    # todos los jobs
+    _PHASES_HEADER = (
+        "PHASES\n"
+        "Water\n"
+        "H2O = H2O\n"
+        "log_K 100\n"
+        "SAVE SOLUTION 1\n"
+        "END\n"
+    )
+
     def __init__(self, phreeqc_bin: str, phreeqc_db: str, work_dir: Path):
         """Initialize PhreeqcRunner with explicit paths.
 
@@ -65,6 +264,65 @@ class PhreeqcRunner:
         self.model.inputFile = str((self.work_dir / "input.in").resolve())
         self.model.outputFile = str((self.output_dir / "output.out").resolve())
 
+    def branch(self, name: str) -> "PhreeqcRunner":
+        """Create a runner for an independent simulation branch.
+
+        The branch shares the PHREEQC binary and database but works in its own
+        subdirectory under work_dir, so two branches can run concurrently
+        without clobbering each other's input.in.
+
+        Args:
+            name: Subdirectory name for the branch working directory
+
+        Returns:
+            Runner of the same concrete type rooted at work_dir/name
+        """
+        return type(self)(self.model.phBin, self.model.phDb, self.work_dir / name)
+
+    def async_read_many(self, paths: Iterable[Path]) -> list[bytes | None]:
+        """Read a batch of just-produced output files in one go.
+
+        At each halite barrier several results files become readable at the
+        same time; fetching them as a batch overlaps the blocking open/read
+        round-trips instead of paying them serially. Files that cannot be
+        read yield None so callers can keep their own missing-file handling.
+
+        Args:
+            paths: Output file paths to read
+
+        Returns:
+            File contents (bytes) in the same order, None where unreadable
+        """
+        def _read(p: Path) -> bytes | None:
+            try:
+                return Path(p).read_bytes()
+            except OSError:
+                return None
+
+        paths = list(paths)
+        if len(paths) <= 1:
+            return [_read(p) for p in paths]
+        with ThreadPoolExecutor(max_workers=min(4, len(paths))) as ex:
+            return list(ex.map(_read, paths))
+
+    @classmethod
+    def from_paths(cls, phreeqc_bin: Path | str, phreeqc_database: Path | str,
+                   work_dir: Path | str) -> "PhreeqcRunner":
+        """Create PhreeqcRunner from explicit, already-resolved paths.
+
+        This is the entry point the CLI uses once config.yaml has been
+        validated; no discovery is attempted.
+
+        Args:
+            phreeqc_bin: Path to PHREEQC executable binary
+            phreeqc_database: Path to PHREEQC database file
+            work_dir: Working directory for simulation files
+
+        Returns:
+            Configured PhreeqcRunner instance
+        """
+        return cls(str(phreeqc_bin), str(phreeqc_database), Path(work_dir))
+
     @classmethod
     def from_workspace(cls, workspace_root: Path | str, work_dir: Path | str | None = None) -> "PhreeqcRunner":
         """Create PhreeqcRunner by auto-discovering PHREEQC installation.
@@ -83,58 +341,23 @@ class PhreeqcRunner:
             FileNotFoundError: If PHREEQC binary or database cannot be found
         """
         root = Path(workspace_root).resolve()
-        bin_path: Path | None = None
-        db_path: Path | None = None
-
-        # Executable names by OS
-        bin_names = ["phreeqc", "phreeqc.exe", "phreeqc.bat"]
-
-        # Look for folders like 'phreeqc-*'
-        for d in sorted(root.iterdir()):
-            if not (d.is_dir() and d.name.lower().startswith("phreeqc")):
-                continue
-
-            # Try possible executables
-            for bn in bin_names:
-                candidate_bin = d / "bin" / bn
-                if not candidate_bin.exists():
-                    continue
-
-                # Database priority
-                for name in ["phreeqc.dat", "pitzer.dat", "minteq.v4.dat", "llnl.dat"]:
-                    candidate_db = d / "database" / name
-                    if candidate_db.exists():
-                        bin_path = candidate_bin
-                        db_path = candidate_db
-                        break
-
-                if bin_path and db_path:
-                    break
-
-            if bin_path and db_path:
-                break
-
-        if not (bin_path and db_path):
-            raise FileNotFoundError(
-                f"No se encontró PHREEQC bin/database bajo {root}. "
-                f"Esperaba phreeqc-*/bin/{{{', '.join(bin_names)}}} y database/*.dat"
-            )
+        bin_path, db_path = _discover_phreeqc(root)
 
         if work_dir is None:
             work_dir = root / "phreeqc_work"
 
         return cls(str(bin_path), str(db_path), Path(work_dir))
 
-    def _write_section(self, fh, text: str) -> None:
-        """Write a text section to PHREEQC input file.
+    def _write_section(self, out: list[str], text: str) -> None:
+        """Append a text section to the input parts buffer.
 
         Args:
-            fh: File handle for writing
-            text: Text content to write
+            out: List accumulating input file sections
+            text: Text content to append
         """
-        fh.write(text)
+        out.append(text)
 
-    def build_input(self, jobs: Iterable[PhreeqcJobSpec]) -> Path:
+    def build_input(self, jobs: "Iterable[PhreeqcJobSpec] | PhreeqcJobBatch") -> Path:
         """Generate PHREEQC input file from job specifications.
 
         Creates a complete PHREEQC input file with multiple simulation jobs,
@@ -152,44 +375,108 @@ class PhreeqcRunner:
             - Subsequent jobs use saved solution states
             - Each job generates separate SELECTED_OUTPUT file
             - Water removal simulated via negative REACTION
+            - A PhreeqcJobBatch renders through the columnar fast path
         """
+        if isinstance(jobs, PhreeqcJobBatch):
+            return self._build_input_batch(jobs)
         input_path = self.work_dir / "input.in"
-        with open(input_path, "w", encoding="utf-8") as f:
-            first = True
-            for j in jobs:
-                if first:
-                    f.write("SOLUTION 1\n")
-                    for line in j.solution_lines:
-                        f.write(line)
-                    first = False
-                f.write("PHASES\n")
-                f.write("Water\n")
-                f.write("H2O = H2O\n")
-                f.write("log_K 100\n")
-                f.write("SAVE SOLUTION 1\n")
-                f.write("END\n")
-                f.write("USE SOLUTION 1\n")
-                f.write("REACTION 1\n")
-                f.write("Water\n")
-                f.write(f"-{j.reaction_mols} mol in {j.reaction_steps} steps\n")
-                f.write("INCREMENTAL_REACTIONS true\n")
-                f.write("EQUILIBRIUM_PHASES 1\n")
-                for ph in j.eq_phases:
-                    f.write(f"{ph} 0.0 0.0\n")
-                f.write("SELECTED_OUTPUT\n")
-                # ensure results go into output dir
-                f.write(f"-file {(self.output_dir / j.results_file).as_posix()}\n")
-                f.write("-selected_out true\n")
-                f.write("-step true\n")
-                f.write("-ph true\n")
-                f.write("-reaction true\n")
-                f.write("-equilibrium_phases " + " ".join(j.eq_phases) + "\n")
-                f.write("-totals Cl Na S K Ca Mg\n")
-                if j.save_solution_tag:
-                    f.write(f"SAVE SOLUTION {j.save_solution_tag}\n")
-                if j.save_phases_tag:
-                    f.write(f"SAVE EQUILIBRIUM_PHASES {j.save_phases_tag}\n")
-                f.write("END\n")
+        # El input se ensambla en memoria y se escribe con una sola syscall,
+        # en lugar de una llamada a write() por linea
+        parts: list[str] = []
+        first = True
+        for j in jobs:
+            if first:
+                parts.append("SOLUTION 1\n")
+                parts.extend(j.solution_lines)
+                first = False
+            parts.append(self._PHASES_HEADER)
+            parts.append("USE SOLUTION 1\n")
+            parts.append("REACTION 1\n")
+            parts.append("Water\n")
+            parts.append(f"-{j.reaction_mols} mol in {j.reaction_steps} steps\n")
+            parts.append("INCREMENTAL_REACTIONS true\n")
+            parts.append("EQUILIBRIUM_PHASES 1\n")
+            for ph in j.eq_phases:
+                parts.append(f"{ph} 0.0 0.0\n")
+            parts.append("SELECTED_OUTPUT\n")
+            # ensure results go into output dir
+            parts.append(f"-file {(self.output_dir / j.results_file).as_posix()}\n")
+            parts.append(
+                "-selected_out true\n"
+                "-step true\n"
+                "-ph true\n"
+                "-reaction true\n"
+            )
+            parts.append("-equilibrium_phases " + " ".join(j.eq_phases) + "\n")
+            parts.append("-totals Cl Na S K Ca Mg\n")
+            if j.save_solution_tag:
+                parts.append(f"SAVE SOLUTION {j.save_solution_tag}\n")
+            if j.save_phases_tag:
+                parts.append(f"SAVE EQUILIBRIUM_PHASES {j.save_phases_tag}\n")
+            parts.append("END\n")
+        write_input_parts(input_path, parts)
+        return input_path
+
+
+    def _build_input_batch(self, batch: PhreeqcJobBatch) -> Path:
+        """Render a columnar job batch into input.in.
+
+        The per-job reaction lines are formatted in bulk with np.char.mod and
+        the per-phases-group sections are pre-rendered once, so the Python
+        loop only stitches precomputed fragments.
+
+        Args:
+            batch: Columnar job specifications
+
+        Returns:
+            Path to generated input file (work_dir/input.in)
+        """
+        input_path = self.work_dir / "input.in"
+        n = len(batch.results_files)
+
+        # Lineas REACTION formateadas en bloque (un pase C por columna)
+        reaction_lines = np.char.add(
+            np.char.mod("-%g mol in ", batch.reaction_mols),
+            np.char.mod("%d steps\n", batch.reaction_steps),
+        ).tolist()
+        # Secciones por grupo de fases, renderizadas una vez por grupo
+        phase_sections = [
+            "".join(f"{ph} 0.0 0.0\n" for ph in group) for group in batch.phases_table
+        ]
+        phase_headers = [
+            "-equilibrium_phases " + " ".join(group) + "\n" for group in batch.phases_table
+        ]
+        out_dir_str = self.output_dir.as_posix()
+
+        parts: list[str] = []
+        for i in range(n):
+            if i == 0:
+                parts.append("SOLUTION 1\n")
+                parts.extend(batch.solution_lines)
+            parts.append(self._PHASES_HEADER)
+            parts.append("USE SOLUTION 1\n")
+            parts.append("REACTION 1\n")
+            parts.append("Water\n")
+            parts.append(reaction_lines[i])
+            parts.append("INCREMENTAL_REACTIONS true\n")
+            parts.append("EQUILIBRIUM_PHASES 1\n")
+            parts.append(phase_sections[batch.eq_phases_idx[i]])
+            parts.append("SELECTED_OUTPUT\n")
+            parts.append(f"-file {out_dir_str}/{batch.results_files[i]}\n")
+            parts.append(
+                "-selected_out true\n"
+                "-step true\n"
+                "-ph true\n"
+                "-reaction true\n"
+            )
+            parts.append(phase_headers[batch.eq_phases_idx[i]])
+            parts.append("-totals Cl Na S K Ca Mg\n")
+            if batch.save_solution_tags and batch.save_solution_tags[i]:
+                parts.append(f"SAVE SOLUTION {batch.save_solution_tags[i]}\n")
+            if batch.save_phases_tags and batch.save_phases_tags[i]:
+                parts.append(f"SAVE EQUILIBRIUM_PHASES {batch.save_phases_tags[i]}\n")
+            parts.append("END\n")
+        write_input_parts(input_path, parts)
         return input_path
 
     def run(self) -> None:
@@ -204,3 +491,105 @@ class PhreeqcRunner:
             FileNotFoundError: If PHREEQC binary or database not found
         """
         self.model.runModel()
+
+
+class LibPhreeqcRunner(PhreeqcRunner):
+    """PHREEQC runner backed by the in-process IPhreeqc library.
+
+    Drop-in replacement for PhreeqcRunner that keeps the reaction engine
+    inside the Python process via the optional phreeqpy bindings: the
+    thermodynamic database is parsed once at construction and each run()
+    is a RunString call, skipping the fork/exec and database re-parse the
+    CLI binary pays on every invocation.
+
+    Requires ``pip install phreeqpy`` (and a libiphreeqc build on the
+    library path). The phreeqc_bin argument is accepted for interface
+    compatibility but unused.
+
+    Combined with the barrier-batched pipeline (which already coalesces the
+    14 stages into 6 invocations), this makes the whole run a handful of
+    RunString calls over one loaded database, with no process launches.
+    """
+
+    def __init__(self, phreeqc_bin: str, phreeqc_db: str, work_dir: Path):
+        """Initialize the in-process runner and load the database once.
+
+        Args:
+            phreeqc_bin: Ignored (kept for PhreeqcRunner compatibility)
+            phreeqc_db: Path to PHREEQC database file
+            work_dir: Working directory for simulation files
+
+        Raises:
+            ImportError: If the phreeqpy package is not installed
+            RuntimeError: If the database fails to load
+        """
+        if IPhreeqc is None:
+            raise ImportError(
+                "phreeqpy no está instalado: LibPhreeqcRunner necesita "
+                "'pip install phreeqpy' (o usar PhreeqcRunner con el binario)"
+            )
+        super().__init__(phreeqc_bin, phreeqc_db, work_dir)
+        self._ip = IPhreeqc()
+        if self._ip.load_database(str(Path(phreeqc_db).resolve())) != 0:
+            raise RuntimeError(
+                f"IPhreeqc no pudo cargar la base de datos {phreeqc_db}: "
+                f"{self._ip.get_error_string()}"
+            )
+
+    def run(self) -> None:
+        """Run the current input.in through the in-process engine.
+
+        SELECTED_OUTPUT file writing is enabled so the results*.dat
+        contract of the pipeline is preserved; the database loaded at
+        construction is reused across calls.
+
+        Raises:
+            RuntimeError: If PHREEQC reports errors for the input
+        """
+        input_text = Path(self.model.inputFile).read_text(encoding="utf-8")
+        # IPhreeqc captura SELECTED_OUTPUT en memoria por defecto: activar
+        # la escritura a fichero para conservar los results*.dat
+        self._ip.set_selected_output_file_on(True)
+        try:
+            self._ip.run_string(input_text)
+        except Exception as exc:
+            raise RuntimeError(f"IPhreeqc failed running input.in: {exc}") from exc
+
+
+def _smoke_batch_input(n_jobs: int = 1200) -> None:
+    """Render a large columnar batch end to end and validate the input file.
+
+    Exercises ``_build_input_batch`` plus ``write_input_parts`` at the scale
+    the fast path was written for (thousands of jobs, well past IOV_MAX
+    fragments). Run with ``python -m src.domain.phreeqc_runner``.
+
+    Args:
+        n_jobs: Number of jobs to render (must exceed ~70 to cross IOV_MAX)
+
+    Raises:
+        AssertionError: If the rendered input is incomplete or malformed
+    """
+    import tempfile
+
+    batch = PhreeqcJobBatch(
+        solution_lines=["units mol/L\n", "temp 25\n"],
+        reaction_mols=np.full(n_jobs, 1.5, dtype=np.float64),
+        reaction_steps=np.full(n_jobs, 10, dtype=np.int32),
+        eq_phases_idx=np.zeros(n_jobs, dtype=np.int32),
+        phases_table=[["Calcite", "Halite", "Gypsum"]],
+        results_files=[f"results{i}.dat" for i in range(n_jobs)],
+    )
+    with tempfile.TemporaryDirectory() as td:
+        runner = PhreeqcRunner("phreeqc", "phreeqc.dat", Path(td))
+        input_path = runner.build_input(batch)
+        text = input_path.read_text(encoding="utf-8")
+        assert text.count("SELECTED_OUTPUT") == n_jobs
+        # Dos END por job: el del bloque PHASES compartido y el del cierre
+        assert text.count("END\n") == 2 * n_jobs
+        assert text.count("USE SOLUTION 1\n") == n_jobs
+        assert f"results{n_jobs - 1}.dat" in text
+        print(f"batch input OK: {n_jobs} jobs, {len(text)} bytes")
+
+
+if __name__ == "__main__":
+    _smoke_batch_input()
@@ -1,20 +1,201 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from io import BytesIO
 from pathlib import Path
 from typing import Iterable, Tuple
 
+import numpy as np
 import pandas as pd
 
 from src.domain.models import Pond, Plant, SimulationParams, MineralProps
-from src.domain.phreeqc_runner import PhreeqcRunner, PhreeqcJobSpec
+from src.domain.phreeqc_runner import PhreeqcRunner, PhreeqcJobSpec, write_input_parts
+
+# Masa molar del agua (g/mol), usada en el balance de evaporacion
+_H2O_G_PER_MOL = 18.01528
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+    pa_csv = None
+
+
+@lru_cache(maxsize=128)
+def _resolve_column(cols: tuple[str, ...], candidates: tuple[str, ...]) -> str | None:
+    """Resolve the first matching column name, case-insensitively.
+
+    All stage outputs share the same SELECTED_OUTPUT schema, so caching by
+    (columns, candidates) makes this a single lookup per schema for the run.
+    """
+    cols_low = {c.lower(): c for c in cols}
+    for name in candidates:
+        c = cols_low.get(name.lower())
+        if c is not None:
+            return c
+    return None
+
+
+@lru_cache(maxsize=128)
+def _resolve_phase_column(cols: tuple[str, ...], phase_name: str) -> str | None:
+    """Resolve the column holding moles for a phase (substring match).
+
+    The per-column lower() scan runs once per (schema, phase); the 14 stage
+    frames share the same SELECTED_OUTPUT columns tuple, so every later
+    phase lookup is a memoized dict hit instead of a column sweep.
+    """
+    needle = phase_name.lower()
+    for col in cols:
+        if needle in str(col).lower():
+            return col
+    return None
+
+
+def _cols_key(df: pd.DataFrame) -> tuple[str, ...]:
+    """Return (and cache in df.attrs) the columns tuple used as cache key.
+
+    Avoids re-materializing the tuple on every column lookup; combined with
+    the memoized resolvers each lookup is a dict hit after the first call.
+    """
+    key = df.attrs.get("_cols_key")
+    if key is None:
+        key = tuple(df.columns)
+        df.attrs["_cols_key"] = key
+    return key
+
+
+def _read_selected_output(path: Path, data: bytes | None = None) -> pd.DataFrame:
+    """Parse a PHREEQC SELECTED_OUTPUT file (tab-separated).
+
+    Uses Arrow's multithreaded C++ CSV reader when pyarrow is installed and
+    falls back to pandas otherwise. When ``data`` is given (bytes prefetched
+    via PhreeqcRunner.async_read_many) the parse happens fully in memory.
+    """
+    source = BytesIO(data) if data is not None else str(path)
+    if pa_csv is not None:
+        table = pa_csv.read_csv(
+            source,
+            parse_options=pa_csv.ParseOptions(delimiter="\t"),
+            convert_options=pa_csv.ConvertOptions(strings_can_be_null=True),
+        )
+        return table.to_pandas(self_destruct=True, split_blocks=True)
+    # memory_map evita una copia kernel->userspace cuando se lee del fichero
+    return pd.read_csv(source, sep="\t", memory_map=data is None)
+
+
+def _read_selected_output_columns(path: Path, data: bytes | None = None,
+                                  phase_name: str = "Halite") -> pd.DataFrame:
+    """Parse only the columns a barrier needs (time, reaction, phase moles).
+
+    Resolves the column names from the header line first; if any of them
+    cannot be resolved by name (e.g. padded legacy headers that rely on the
+    positional fallbacks) the full file is parsed instead, so behavior is
+    identical and only the common well-formed case gets the narrow read.
+    """
+    if data is not None:
+        header = data.split(b"\n", 1)[0].decode("utf-8", "replace")
+    else:
+        with open(path, "r", encoding="utf-8") as fh:
+            header = fh.readline()
+    cols = tuple(header.rstrip("\n").split("\t"))
+    tcol = _resolve_column(cols, ("time", "Time", "step", "Step"))
+    rcol = _resolve_column(cols, ("reaction", "Reaction"))
+    pcol = _resolve_phase_column(cols, phase_name)
+    if tcol is None or rcol is None or pcol is None:
+        return _read_selected_output(path, data)
+
+    wanted = list(dict.fromkeys((tcol, rcol, pcol)))
+    source = BytesIO(data) if data is not None else str(path)
+    if pa_csv is not None:
+        table = pa_csv.read_csv(
+            source,
+            parse_options=pa_csv.ParseOptions(delimiter="\t"),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=wanted,
+                # Esquema conocido: las tres columnas son numericas, con tipo
+                # explicito Arrow se salta la inferencia de dtypes
+                column_types={c: pa.float64() for c in wanted},
+                strings_can_be_null=True,
+            ),
+        )
+        return table.to_pandas(self_destruct=True, split_blocks=True)
+    return pd.read_csv(source, sep="\t", usecols=wanted, memory_map=data is None)
+
+
+class LazyOutputs(dict):
+    """Resultados del pipeline con parseo diferido.
+
+    Se comporta como un dict[str, pd.DataFrame]: las entradas que el pipeline
+    no necesita internamente guardan la ruta del fichero y se parsean la
+    primera vez que alguien las consulta, de modo que el pico de memoria solo
+    paga los DataFrames realmente consumidos.
+
+    Los ficheros transitorios (results4/7/10/13) se mantienen en disco en vez
+    de borrarse tras leerlos: los consumidores finales (overlays de Pond 1,
+    resumen de transferencias) los consultan despues del pipeline, y el replay
+    de la cadena SAVE entre barreras requiere que persistan entre batches.
+    """
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        if isinstance(value, Path):
+            value = _read_selected_output(value)
+            super().__setitem__(key, value)
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def values(self):
+        return (self[k] for k in self)
+
+    def items(self):
+        return ((k, self[k]) for k in self)
 
 
 @dataclass
 class Simulation:
+    # Pie fijo de SELECTED_OUTPUT: identico en los 14 bloques, se emite
+    # como un unico fragmento pre-formateado
+    _SELECTED_OUTPUT_TAIL = (
+        "-selected_out true\n"
+        "-step true\n"
+        "-ph true\n"
+        "-reaction true\n"
+        "-equilibrium_phases Calcite Halite Gypsum\n"
+        "-totals Cl Na S K Ca Mg\n"
+    )
+    # Cabecera PHASES para la pseudo-fase Water de evaporacion
+    _PHASES_HEADER = (
+        "PHASES\n"
+        "Water\n"
+        "H2O = H2O\n"
+        "log_K 100\n"
+        "SAVE SOLUTION 1\n"
+        "END\n"
+    )
+
     plant: Plant
     params: SimulationParams
     work_dir: Path
+    # Ejecutar en paralelo las dos ramas independientes de cada barrera
+    # (evolucion del pond receptor y continuacion de Pond 1)
+    parallel_branches: bool = False
+    _sched_np: np.ndarray | None = field(init=False, repr=False, default=None)
+
+    def __post_init__(self) -> None:
+        # Schedule como ndarray (una sola conversion por pipeline, no por bloque).
+        # Comprobacion por longitud: los loaders ya entregan ndarray, cuya
+        # conversion a bool es ambigua.
+        sched = self.params.evap_schedule_mol_per_day_L
+        if sched is not None and len(sched) > 0:
+            self._sched_np = np.asarray(sched, dtype=np.float64)
 
     # ====================== Utilidades internas ======================
 
@@ -25,19 +206,17 @@ class Simulation:
         return pond.area_m2 * level_m * 1000.0  # m3 -> L
 
     def _get_column(self, df: pd.DataFrame, candidates: list[str], fallback_idx: int | None = None) -> pd.Series:
-        cols_low = {c.lower(): c for c in df.columns}
-        for name in candidates:
-            c = cols_low.get(name.lower())
-            if c is not None:
-                return df[c]
+        c = _resolve_column(_cols_key(df), tuple(candidates))
+        if c is not None:
+            return df[c]
         if fallback_idx is not None and fallback_idx < df.shape[1]:
             return df.iloc[:, fallback_idx]
         raise KeyError(f"None of the columns {candidates} found and no valid fallback index provided")
 
     def _find_phase_moles(self, df: pd.DataFrame, phase_name: str, fallback_idx: int | None) -> pd.Series:
-        for col in df.columns:
-            if phase_name.lower() in str(col).lower():
-                return df[col]
+        col = _resolve_phase_column(_cols_key(df), phase_name)
+        if col is not None:
+            return df[col]
         if fallback_idx is not None and fallback_idx < df.shape[1]:
             return df.iloc[:, fallback_idx]
         raise KeyError(f"Could not locate column for phase '{phase_name}' in selected output")
@@ -45,13 +224,14 @@ class Simulation:
     def find_transfer_day_halite(self, df: pd.DataFrame) -> float | None:
         time = self._get_column(df, ["time", "Time", "step", "Step"], fallback_idx=5)
         halite = self._find_phase_moles(df, "Halite", fallback_idx=17)
-        gt0 = halite[halite > 0]
-        if not gt0.empty:
-            first_idx = gt0.index[0]
-            day = float(time.loc[first_idx])
+        # Un solo pase NumPy: argmax corta en el primer True, sin Series filtrada
+        pos_mask = halite.to_numpy() > 0
+        if not pos_mask.any():
+            return None
+        day = float(time.iat[int(pos_mask.argmax())])
+        if self.params.verbose:
             print(f"A transfer is advised at day {day}")
-            return day
-        return None
+        return day
 
     # --------- NUEVO: volumen restante a partir del SELECTED_OUTPUT ---------
 
@@ -65,39 +245,41 @@ class Simulation:
             evap_L = n_evap_mol * 18.01528 (g/mol) / rho (g/L)
             remaining_m3 = max(init_m3 - evap_L/1000, 0)
         """
-        # Volumen inicial
-        init = getattr(self.params, "initial_pond1_m3", None)
+        # Volumen inicial: atributos tipados de SimulationParams (siempre
+        # presentes con default; sin cadenas de getattr con fallback)
+        init = self.params.initial_pond1_m3
         if init is None:
-            caps = getattr(self.params, "pond_capacities_m3", None) or getattr(self.params, "params", {}).get("pond_capacities_m3", {})
+            caps = self.params.pond_capacities_m3 or {}
             init = float(caps.get("pond1", 0.0))
 
         # Densidad (g/L)
-        rho = getattr(self.params, "liquid_density_g_per_L", None)
-        if rho is None:
-            rho = getattr(self.params, "params", {}).get("liquid_density_g_per_L", 1000.0)
-        rho = float(rho)
+        rho = float(self.params.liquid_density_g_per_L)
 
         # Series tiempo y reacción (mol H2O)
         time = self._get_column(df, ["time", "Time", "step", "Step", "reaction", "Reaction"], fallback_idx=5)
         reaction = self._get_column(df, ["reaction", "Reaction"], fallback_idx=6)
-        t_num = pd.to_numeric(time, errors="coerce")
-        r_num = pd.to_numeric(reaction, errors="coerce")
-
-        # Elegir el primer registro con t >= target_day; si no existe, usar el último
-        mask = t_num >= float(target_day)
-        if mask.any():
-            n_evap_mol = float(r_num[mask].dropna().iloc[0])
+        t = pd.to_numeric(time, errors="coerce").to_numpy(dtype=np.float64)
+        r = pd.to_numeric(reaction, errors="coerce").to_numpy(dtype=np.float64)
+
+        # Primer registro con t >= target_day via searchsorted (t es creciente
+        # en el SELECTED_OUTPUT); si no existe, usar el último valor válido
+        i = int(np.searchsorted(t, float(target_day), side="left"))
+        while i < r.size and np.isnan(r[i]):
+            i += 1
+        if i < r.size:
+            n_evap_mol = float(r[i])
         else:
-            n_evap_mol = float(r_num.dropna().iloc[-1])
+            n_evap_mol = float(r[~np.isnan(r)][-1])
 
-        evap_L = n_evap_mol * 18.01528 / rho  # L
+        evap_L = n_evap_mol * _H2O_G_PER_MOL / rho  # L
         remaining_m3 = max(float(init) - (evap_L / 1000.0), 0.0)
 
-        print(
-            f"[POND1 REMAINING] day={target_day} | init={init:.6f} m3 | "
-            f"n_evap={n_evap_mol:.6f} mol | rho={rho:.1f} g/L | evap_L={evap_L:.6f} L | "
-            f"remaining={remaining_m3:.6f} m3"
-        )
+        if self.params.verbose:
+            print(
+                f"[POND1 REMAINING] day={target_day} | init={init:.6f} m3 | "
+                f"n_evap={n_evap_mol:.6f} mol | rho={rho:.1f} g/L | evap_L={evap_L:.6f} L | "
+                f"remaining={remaining_m3:.6f} m3"
+            )
         return remaining_m3
 
     # --------- Control de capacidad (destino vacío, descartar exceso) ---------
@@ -108,33 +290,24 @@ class Simulation:
         Devuelve (allowed_m3, discarded_m3) e imprime el resultado.
         """
         # Capacidades esperadas como dict: {'pond1': m3, ...}
-        caps = None
-        try:
-            caps = getattr(self.params, "pond_capacities_m3", None)
-        except Exception:
-            caps = None
-        if caps is None:
-            caps = getattr(self.params, "params", {}).get("pond_capacities_m3", None)
-
-        policy = "discard_excess"
-        try:
-            policy = getattr(self.params, "transfer_policy", policy)
-        except Exception:
-            pass
+        caps = self.params.pond_capacities_m3
+        policy = self.params.transfer_policy
 
         if not caps or target_pond not in caps:
-            print(f"[TRANSFER CHECK] No capacities; assuming no cap: requested={requested_m3:.8f} m3")
+            if self.params.verbose:
+                print(f"[TRANSFER CHECK] No capacities; assuming no cap: requested={requested_m3:.8f} m3")
             return float(requested_m3), 0.0
 
         target_max = float(caps[target_pond])
         allowed = min(float(requested_m3), target_max)
         discarded = max(float(requested_m3) - allowed, 0.0)
 
-        print(
-            f"[TRANSFER CAPACITY] {source_pond} -> {target_pond} | "
-            f"requested={requested_m3:.8f} m3 | target_max={target_max:.8f} m3 | "
-            f"allowed={allowed:.8f} m3 | DISCARDED={discarded:.8f} m3 | policy={policy}"
-        )
+        if self.params.verbose:
+            print(
+                f"[TRANSFER CAPACITY] {source_pond} -> {target_pond} | "
+                f"requested={requested_m3:.8f} m3 | target_max={target_max:.8f} m3 | "
+                f"allowed={allowed:.8f} m3 | DISCARDED={discarded:.8f} m3 | policy={policy}"
+            )
         return allowed, discarded
 
     # ===================== Bloques y pipeline =====================
@@ -151,24 +324,18 @@ class Simulation:
         )
         runner.build_input([job])
         runner.run()
-        df = pd.read_csv(runner.output_dir / "results.dat", sep="\t")
+        df = _read_selected_output(runner.output_dir / "results.dat")
         self.find_transfer_day_halite(df)
         return df
 
-    def _write_solution_header(self, fh) -> None:
-        fh.write("SOLUTION 1\n")
-        for line in self.plant.brine.phreeqc_solution_lines:
-            fh.write(line)
-        fh.write("PHASES\n")
-        fh.write("Water\n")
-        fh.write("H2O = H2O\n")
-        fh.write("log_K 100\n")
-        fh.write("SAVE SOLUTION 1\n")
-        fh.write("END\n")
+    def _write_solution_header(self, out: list[str]) -> None:
+        out.append("SOLUTION 1\n")
+        out.extend(self.plant.brine.phreeqc_solution_lines)
+        out.append(self._PHASES_HEADER)
 
     def _write_reaction_block(
         self,
-        fh,
+        out: list[str],
         *,
         reaction_id: int,
         steps: int,
@@ -181,94 +348,197 @@ class Simulation:
         save_phases_tag: str | None = None,
         schedule_start_day: int | None = None,
     ) -> None:
-        """Write a PHREEQC reaction block."""
+        """Append a PHREEQC reaction block to the output parts list."""
         factor = max(1, int(self.params.micro_steps_factor))
         total_steps = steps * factor
 
         if use_solution_tag:
-            fh.write(f"USE SOLUTION {use_solution_tag}\n")
+            out.append(f"USE SOLUTION {use_solution_tag}\n")
         else:
-            fh.write("USE SOLUTION 1\n")
+            out.append("USE SOLUTION 1\n")
 
         if use_phases_tag:
-            fh.write(f"USE EQUILIBRIUM_PHASES {use_phases_tag}\n")
+            out.append(f"USE EQUILIBRIUM_PHASES {use_phases_tag}\n")
 
-        fh.write(f"REACTION {reaction_id}\n")
-        fh.write("Water\n")
+        out.append(f"REACTION {reaction_id}\n")
+        out.append("Water\n")
 
-        # Si hay schedule en mol/L/día, emitir incrementos diarios
-        if self.params.evap_schedule_mol_per_day_L and steps > 0:
+        # Si hay schedule en mol/L/dia, emitir incrementos diarios
+        if self._sched_np is not None and steps > 0:
             start = int(schedule_start_day or 0)
             end = start + steps
-            full = self.params.evap_schedule_mol_per_day_L
+            full = self._sched_np
             sched = full[start:end]
-            if len(sched) < steps:
-                fill = full[-1] if len(full) > 0 else self.params.evaporation_rate_mol_per_day_L
-                sched = sched + [fill] * (steps - len(sched))
-            print(f"Using schedule slice [{start}:{end}] = {len(sched)} days, first few: {sched[:5]}")
+            if sched.size < steps:
+                fill = full[-1] if full.size > 0 else self.params.evaporation_rate_mol_per_day_L
+                sched = np.concatenate([sched, np.full(steps - sched.size, fill)])
+            if self.params.verbose:
+                print(f"Using schedule slice [{start}:{end}] = {sched.size} days, first few: {sched[:5].tolist()}")
 
-            # Cap por estabilidad numérica (si procede)
+            # Cap por estabilidad numerica (si procede): np.clip en un solo pase
             max_step = self.params.max_evap_step_mol_L or float('inf')
             if max_step < float('inf'):
-                sched = [min(rate, max_step) for rate in sched]
-                print(f"Capped rates above {max_step}, range now: {min(sched):.3f} to {max(sched):.3f}")
+                sched = np.clip(sched, None, max_step)
+                if self.params.verbose:
+                    print(f"Capped rates above {max_step}, range now: {sched.min():.3f} to {sched.max():.3f}")
 
-            # Cap al nº total de pasos
-            if len(sched) > self.params.max_total_steps:
-                print(f"WARNING: Capping {len(sched)} days to {self.params.max_total_steps}")
+            # Cap al numero total de pasos
+            if sched.size > self.params.max_total_steps:
+                print(f"WARNING: Capping {sched.size} days to {self.params.max_total_steps}")
                 sched = sched[:self.params.max_total_steps]
 
-            sched_line = " ".join(f"-{x}" for x in sched)
-            fh.write(f"{sched_line}\n")
-            fh.write("INCREMENTAL_REACTIONS true\n")
+            # np.char.mod formatea todo el array en C; tolist() entrega
+            # str nativos para que str.join tampoco itere el ndarray
+            sched_line = "-" + " -".join(np.char.mod("%g", sched).tolist())
+            out.append(f"{sched_line}\n")
+            out.append("INCREMENTAL_REACTIONS true\n")
         else:
-            # Mantener moles totales, con más pasos para estabilidad
-            fh.write(f"-{ev_mols} mol in {total_steps} steps\n")
-            fh.write("INCREMENTAL_REACTIONS true\n")
+            # Mantener moles totales, con mas pasos para estabilidad
+            out.append(f"-{ev_mols} mol in {total_steps} steps\n")
+            out.append("INCREMENTAL_REACTIONS true\n")
 
-        # EQUILIBRIUM_PHASES sólo si no reutilizamos una existente
+        # EQUILIBRIUM_PHASES solo si no reutilizamos una existente
         if eq_phases_id is not None and not use_phases_tag:
-            fh.write(f"EQUILIBRIUM_PHASES {eq_phases_id}\n")
-            fh.write("Calcite 0.0 0.0\n")
-            fh.write("Gypsum 0.0 0.0\n")
-            fh.write("Halite 0.0 0.0\n")
-
-        fh.write("SELECTED_OUTPUT\n")
-        fh.write(f"-file {results_file}\n")
-        fh.write("-selected_out true\n")
-        fh.write("-step true\n")
-        fh.write("-ph true\n")
-        fh.write("-reaction true\n")
-        fh.write("-equilibrium_phases Calcite Halite Gypsum\n")
-        fh.write("-totals Cl Na S K Ca Mg\n")
+            out.append(f"EQUILIBRIUM_PHASES {eq_phases_id}\n")
+            out.append("Calcite 0.0 0.0\n")
+            out.append("Gypsum 0.0 0.0\n")
+            out.append("Halite 0.0 0.0\n")
+
+        # Un unico fragmento: solo la linea -file varia entre bloques
+        out.append(f"SELECTED_OUTPUT\n-file {results_file}\n" + self._SELECTED_OUTPUT_TAIL)
 
         if save_solution_tag:
-            fh.write(f"SAVE SOLUTION {save_solution_tag}\n")
+            out.append(f"SAVE SOLUTION {save_solution_tag}\n")
         if save_phases_tag:
-            fh.write(f"SAVE EQUILIBRIUM_PHASES {save_phases_tag}\n")
+            out.append(f"SAVE EQUILIBRIUM_PHASES {save_phases_tag}\n")
 
-        fh.write("END\n")
+        out.append("END\n")
 
     def run_full_pipeline(self, runner: PhreeqcRunner, max_stages: int = 12) -> tuple[dict[str, pd.DataFrame], dict[str, int]]:
-        """Pipeline por etapas (equivalente al legacy)."""
-        outputs: dict[str, pd.DataFrame] = {}
+        """Pipeline por etapas (equivalente al legacy).
+
+        Las etapas que no dependen del siguiente dia de transferencia se agrupan
+        en una unica invocacion de PHREEQC: el input.in se reescribe completo en
+        cada barrera de deteccion de halita y solo entonces se relanza el binario.
+
+        El SELECTED_OUTPUT se mantiene deliberadamente en un fichero por etapa:
+        PHREEQC trunca el -file en cada bloque (no hay modo append), y el replay
+        podado de la cadena SAVE entre barreras cuenta con que los results*.dat
+        de etapas ya ejecutadas persistan en disco. Coalescerlos en un unico
+        fichero obligaria a re-ejecutar todas las etapas en cada barrera; el
+        coste por fichero se amortigua en su lugar con lectura batched, parse
+        de columnas minimas y registro diferido.
+        """
+        outputs = LazyOutputs()
         stage_start_days: dict[str, int] = {}
         input_path = runner.work_dir / "input.in"
-
-        # 1) Pond 1 inicial (100 días) -> results.dat y tr1
-        with open(input_path, "w", encoding="utf-8") as f:
-            self._write_solution_header(f)
-            self._write_reaction_block(
-                f,
-                reaction_id=1,
-                steps=self.params.nsteps_default_days,
-                ev_mols=self._evap_mols(self.params.nsteps_default_days),
-                results_file=(runner.output_dir / "results.dat").as_posix(),
-                eq_phases_id=1,
-                schedule_start_day=0,
-            )
-        runner.run()
-        df1 = pd.read_csv(runner.output_dir / "results.dat", sep="\t")
+        # Ruta de salida pre-renderizada: evita re-normalizar Path por bloque
+        out_dir_str = runner.output_dir.as_posix()
+        # Paths de resultados precomputados (resueltos una vez por pipeline)
+        out_paths = {"results.dat": runner.output_dir / "results.dat"}
+        out_paths.update(
+            (f"results{i}.dat", runner.output_dir / f"results{i}.dat")
+            for i in range(2, 15)
+        )
+        # Constantes de etapa repetidas en 7 bloques
+        nsd = self.params.nsteps_default_days
+        default_evmols = self._evap_mols(nsd)
+
+        # Programa PHREEQC acumulado: lista de kwargs de _write_reaction_block.
+        # Tras cada barrera se conservan solo los bloques que llevan SAVE
+        # (la cadena de estado Pond1 -> transferencias): los bloques de
+        # observacion/evolucion ya ejecutados no alteran las soluciones
+        # guardadas y sus results*.dat ya existen en disco, asi que
+        # re-ejecutarlos en cada barrera es trabajo cuadratico inutil.
+        blocks: list[dict] = []
+
+        def prune_to_state_chain() -> None:
+            blocks[:] = [
+                b for b in blocks
+                if b.get("save_solution_tag") or b.get("save_phases_tag")
+            ]
+
+        def write_program(path: Path, program: list[dict]) -> None:
+            # Reescritura completa: se ensambla todo el input en memoria y se
+            # emite con una unica syscall via writev (nunca se reabre el
+            # archivo en modo append ni se escribe linea a linea)
+            parts: list[str] = []
+            self._write_solution_header(parts)
+            for kw in program:
+                self._write_reaction_block(parts, **kw)
+            write_input_parts(path, parts)
+
+        def run_branch(name: str, program: list[dict]) -> None:
+            sub = runner.branch(name)
+            write_program(sub.work_dir / "input.in", program)
+            sub.run()
+
+        def run_batch(split_tail: bool = False) -> None:
+            if self.parallel_branches and split_tail:
+                # Los dos ultimos bloques son independientes entre si: cada
+                # rama re-ejecuta el prefijo en su propio work_dir y ambos
+                # procesos PHREEQC corren a la vez (maximo 2 concurrentes).
+                # Bastan hilos: el trabajo pesado ya vive en el subproceso
+                # PHREEQC de cada rama, asi que un pool de procesos solo
+                # anadiria pickling del runner sin ganar paralelismo real.
+                base = blocks[:-2]
+                with ThreadPoolExecutor(max_workers=2) as ex:
+                    futures = [
+                        ex.submit(run_branch, "branch_a", base + [blocks[-2]]),
+                        ex.submit(run_branch, "branch_b", base + [blocks[-1]]),
+                    ]
+                    for fut in futures:
+                        fut.result()
+                prune_to_state_chain()
+                return
+            write_program(input_path, blocks)
+            runner.run()
+            prune_to_state_chain()
+
+        def read_batch(*names: str, optional: tuple[str, ...] = (), narrow: bool = False) -> dict[str, pd.DataFrame]:
+            # Lectura batched + parse concurrente de los ficheros recien
+            # producidos en la barrera (el tokenizador CSV suelta el GIL)
+            paths = [out_paths[n] for n in names]
+            blobs = runner.async_read_many(paths)
+
+            def parse(name: str, path: Path, blob: bytes | None) -> pd.DataFrame | None:
+                reader = _read_selected_output_columns if narrow else _read_selected_output
+                try:
+                    return reader(path, data=blob)
+                except Exception:
+                    if name in optional:
+                        return None
+                    raise
+
+            with ThreadPoolExecutor(max_workers=min(4, len(names))) as ex:
+                frames = list(ex.map(parse, names, paths, blobs))
+            return {n: f for n, f in zip(names, frames) if f is not None}
+
+        def register_lazy(*names: str, optional: tuple[str, ...] = ()) -> None:
+            # Ficheros que el pipeline no consume: se registran como ruta y
+            # se parsean solo si el consumidor final los pide
+            for n in names:
+                path = out_paths[n]
+                if path.exists():
+                    outputs[n] = path
+                elif n not in optional:
+                    raise FileNotFoundError(path)
+
+        # 1) Pond 1 inicial (100 dias) -> results.dat y tr1
+        blocks.append(dict(
+            reaction_id=1,
+            steps=nsd,
+            ev_mols=default_evmols,
+            results_file=f"{out_dir_str}/results.dat",
+            eq_phases_id=1,
+            schedule_start_day=0,
+        ))
+        run_batch()
+        # results.dat pertenece a la cadena SAVE: cada barrera posterior lo
+        # reescribe con el prefijo podado (steps=tr1), asi que hay que
+        # parsearlo completo AHORA, no registrarlo como ruta diferida. El
+        # frame completo sirve tambien para la decision de barrera.
+        df1 = _read_selected_output(out_paths["results.dat"])
         outputs["results.dat"] = df1
         stage_start_days["results.dat"] = 0
         tr1_local = self.find_transfer_day_halite(df1)
@@ -276,289 +546,144 @@ class Simulation:
             return outputs, stage_start_days
         tr1 = int(max(1, int(tr1_local)))
 
-        # Volumen restante en Pond1 al día tr1 (m3)
+        # Volumen restante en Pond1 al dia tr1 (m3)
         requested_12 = self._remaining_vol_from_output(df1, tr1)
 
-        # 2) Transfer a Pond 2 y evolución 100 días -> results2.dat
-        with open(input_path, "w", encoding="utf-8") as f:
-            self._write_solution_header(f)
-            # Carga hasta el punto de transferencia; guardamos SOLUTION 2 / EQ 1
-            self._write_reaction_block(
-                f,
-                reaction_id=1,
-                steps=tr1,
-                ev_mols=self._evap_mols(tr1),
-                results_file=(runner.output_dir / "results.dat").as_posix(),
-                eq_phases_id=1,
-                save_solution_tag="2",
-                save_phases_tag="1",
-                schedule_start_day=0,
-            )
-            # Control de capacidad y descarte: Pond1 -> Pond2
-            self._cap_transfer("pond1", "pond2", requested_12)
-            # Evolución Pond 2 (100 días)
-            self._write_reaction_block(
-                f,
-                reaction_id=2,
-                steps=self.params.nsteps_default_days,
-                ev_mols=self._evap_mols(self.params.nsteps_default_days),
-                results_file=(runner.output_dir / "results2.dat").as_posix(),
-                eq_phases_id=100,
-                use_solution_tag="2",
-                schedule_start_day=tr1,
-            )
-        runner.run()
-        df2 = pd.read_csv(runner.output_dir / "results2.dat", sep="\t")
-        outputs["results2.dat"] = df2
+        # 2) Transfer a Pond 2, evolucion Pond 2 (100 dias) y continuacion de
+        #    Pond 1: independientes una vez conocido tr1 -> un solo run
+        blocks.insert(0, dict(
+            reaction_id=1,
+            steps=tr1,
+            ev_mols=self._evap_mols(tr1),
+            results_file=f"{out_dir_str}/results.dat",
+            eq_phases_id=1,
+            save_solution_tag="2",
+            save_phases_tag="1",
+            schedule_start_day=0,
+        ))
+        # Control de capacidad y descarte: Pond1 -> Pond2
+        self._cap_transfer("pond1", "pond2", requested_12)
+        blocks.append(dict(
+            reaction_id=2,
+            steps=nsd,
+            ev_mols=default_evmols,
+            results_file=f"{out_dir_str}/results2.dat",
+            eq_phases_id=100,
+            use_solution_tag="2",
+            schedule_start_day=tr1,
+        ))
+        blocks.append(dict(
+            reaction_id=3,
+            steps=nsd,
+            ev_mols=default_evmols,
+            results_file=f"{out_dir_str}/results3.dat",
+            eq_phases_id=101,
+            use_solution_tag="1",
+            use_phases_tag="1",
+            schedule_start_day=tr1,
+        ))
+        run_batch(split_tail=True)
+        batch = read_batch("results3.dat", narrow=True)
+        register_lazy("results2.dat", "results3.dat")
         stage_start_days["results2.dat"] = tr1
-
-        # 3) Pond 1 tras transfer a Pond 2 (100 días) -> results3.dat, obtener tr2
-        with open(input_path, "a", encoding="utf-8") as f:
-            self._write_reaction_block(
-                f,
-                reaction_id=3,
-                steps=self.params.nsteps_default_days,
-                ev_mols=self._evap_mols(self.params.nsteps_default_days),
-                results_file=(runner.output_dir / "results3.dat").as_posix(),
-                eq_phases_id=101,
-                use_solution_tag="1",
-                use_phases_tag="1",
-                schedule_start_day=tr1,
-            )
-        runner.run()
-        df3 = pd.read_csv(runner.output_dir / "results3.dat", sep="\t")
-        outputs["results3.dat"] = df3
+        df3 = batch["results3.dat"]
         stage_start_days["results3.dat"] = tr1
         tr2_local = self.find_transfer_day_halite(df3)
         if tr2_local is None:
             return outputs, stage_start_days
         tr2 = int(tr1 + int(max(1, int(tr2_local))))
 
-        # Volumen restante al día tr2
+        # Volumen restante al dia tr2
         requested_13 = self._remaining_vol_from_output(df3, tr2)
 
-        # 4) Transfer a Pond 3 (carga hasta tr2-tr1) -> results4.dat; evolución Pond 3 100d -> results5.dat
-        with open(input_path, "a", encoding="utf-8") as f:
-            # Carga adicional en Pond 1
-            self._write_reaction_block(
-                f,
-                reaction_id=4,
-                steps=tr2 - tr1,
-                ev_mols=self._evap_mols(tr2 - tr1),
-                results_file=(runner.output_dir / "results4.dat").as_posix(),
-                eq_phases_id=2,
-                use_solution_tag="1",
-                use_phases_tag="1",
-                save_solution_tag="3",
-                save_phases_tag="2",
-                schedule_start_day=tr1,
-            )
-            # Control: Pond1 -> Pond3
-            self._cap_transfer("pond1", "pond3", requested_13)
-            # Evolución Pond 3
-            self._write_reaction_block(
-                f,
-                reaction_id=5,
-                steps=self.params.nsteps_default_days,
-                ev_mols=self._evap_mols(self.params.nsteps_default_days),
-                results_file=(runner.output_dir / "results5.dat").as_posix(),
-                eq_phases_id=102,
-                use_solution_tag="3",
-                schedule_start_day=tr2,
-            )
-        runner.run()
-        try:
-            outputs["results4.dat"] = pd.read_csv(runner.output_dir / "results4.dat", sep="\t")
-        except Exception:
-            pass
-        df5 = pd.read_csv(runner.output_dir / "results5.dat", sep="\t")
-        outputs["results5.dat"] = df5
-        stage_start_days["results5.dat"] = tr2
-
-        # 5) Pond 1 tras transfer a Pond 3 (100 días) -> results6.dat, obtener tr3
-        with open(input_path, "a", encoding="utf-8") as f:
-            self._write_reaction_block(
-                f,
-                reaction_id=6,
-                steps=self.params.nsteps_default_days,
-                ev_mols=self._evap_mols(self.params.nsteps_default_days),
-                results_file=(runner.output_dir / "results6.dat").as_posix(),
-                eq_phases_id=103,
-                use_solution_tag="1",
-                use_phases_tag="2",
-                schedule_start_day=tr2,
-            )
-        runner.run()
-        df6 = pd.read_csv(runner.output_dir / "results6.dat", sep="\t")
-        outputs["results6.dat"] = df6
-        stage_start_days["results6.dat"] = tr2
-        tr3_local = self.find_transfer_day_halite(df6)
-        if tr3_local is None:
-            return outputs, stage_start_days
-        tr3 = int(tr2 + int(max(1, int(tr3_local))))
-
-        # Volumen restante al día tr3
-        requested_14 = self._remaining_vol_from_output(df6, tr3)
-
-        # 6) Transfer a Pond 4 -> results7.dat / results8.dat
-        with open(input_path, "a", encoding="utf-8") as f:
-            self._write_reaction_block(
-                f,
-                reaction_id=7,
-                steps=tr3 - tr2,
-                ev_mols=self._evap_mols(tr3 - tr2),
-                results_file=(runner.output_dir / "results7.dat").as_posix(),
-                eq_phases_id=3,
+        # 3-5) Transferencias a Ponds 3/4/5: tres ciclos identicos salvo
+        #    indices (reaction_id, tags SAVE/USE y ficheros), conducidos por
+        #    el numero de balsa destino k
+        tr_prev, tr_cur, requested = tr1, tr2, requested_13
+        for k in range(3, 6):
+            rid = 3 * k - 5
+            f_tr = f"results{rid}.dat"
+            f_ev = f"results{rid + 1}.dat"
+            f_cont = f"results{rid + 2}.dat"
+            # Transfer a Pond k (carga hasta tr_cur - tr_prev)
+            blocks.append(dict(
+                reaction_id=rid,
+                steps=tr_cur - tr_prev,
+                ev_mols=self._evap_mols(tr_cur - tr_prev),
+                results_file=f"{out_dir_str}/{f_tr}",
+                eq_phases_id=k - 1,
                 use_solution_tag="1",
-                use_phases_tag="2",
-                save_solution_tag="4",
-                save_phases_tag="3",
-                schedule_start_day=tr2,
-            )
-            # Control: Pond1 -> Pond4
-            self._cap_transfer("pond1", "pond4", requested_14)
-            self._write_reaction_block(
-                f,
-                reaction_id=8,
-                steps=self.params.nsteps_default_days,
-                ev_mols=self._evap_mols(self.params.nsteps_default_days),
-                results_file=(runner.output_dir / "results8.dat").as_posix(),
-                eq_phases_id=104,
-                use_solution_tag="4",
-                schedule_start_day=tr3,
-            )
-        runner.run()
-        try:
-            outputs["results7.dat"] = pd.read_csv(runner.output_dir / "results7.dat", sep="\t")
-        except Exception:
-            pass
-        df8 = pd.read_csv(runner.output_dir / "results8.dat", sep="\t")
-        outputs["results8.dat"] = df8
-        stage_start_days["results8.dat"] = tr3
-
-        # 7) Pond 1 tras transfer a Pond 4 (100 días) -> results9.dat, obtener tr4
-        with open(input_path, "a", encoding="utf-8") as f:
-            self._write_reaction_block(
-                f,
-                reaction_id=9,
-                steps=self.params.nsteps_default_days,
-                ev_mols=self._evap_mols(self.params.nsteps_default_days),
-                results_file=(runner.output_dir / "results9.dat").as_posix(),
-                eq_phases_id=105,
+                use_phases_tag=str(k - 2),
+                save_solution_tag=str(k),
+                save_phases_tag=str(k - 1),
+                schedule_start_day=tr_prev,
+            ))
+            # Control de capacidad y descarte: Pond1 -> Pond k
+            self._cap_transfer("pond1", f"pond{k}", requested)
+            # Evolucion de Pond k (100 dias)
+            blocks.append(dict(
+                reaction_id=rid + 1,
+                steps=nsd,
+                ev_mols=default_evmols,
+                results_file=f"{out_dir_str}/{f_ev}",
+                eq_phases_id=100 + 2 * (k - 2),
+                use_solution_tag=str(k),
+                schedule_start_day=tr_cur,
+            ))
+            # Continuacion de Pond 1
+            blocks.append(dict(
+                reaction_id=rid + 2,
+                steps=nsd,
+                ev_mols=default_evmols,
+                results_file=f"{out_dir_str}/{f_cont}",
+                eq_phases_id=101 + 2 * (k - 2),
                 use_solution_tag="1",
-                use_phases_tag="3",
-                schedule_start_day=tr3,
-            )
-        runner.run()
-        df9 = pd.read_csv(runner.output_dir / "results9.dat", sep="\t")
-        outputs["results9.dat"] = df9
-        stage_start_days["results9.dat"] = tr3
-        tr4_local = self.find_transfer_day_halite(df9)
-        if tr4_local is None:
-            return outputs, stage_start_days
-        tr4 = int(tr3 + int(max(1, int(tr4_local))))
-
-        # Volumen restante al día tr4
-        requested_15 = self._remaining_vol_from_output(df9, tr4)
-
-        # 8) Transfer a Pond 5 -> results10.dat / results11.dat
-        with open(input_path, "a", encoding="utf-8") as f:
-            self._write_reaction_block(
-                f,
-                reaction_id=10,
-                steps=tr4 - tr3,
-                ev_mols=self._evap_mols(tr4 - tr3),
-                results_file=(runner.output_dir / "results10.dat").as_posix(),
-                eq_phases_id=4,
-                use_solution_tag="1",
-                use_phases_tag="3",
-                save_solution_tag="5",
-                save_phases_tag="4",
-                schedule_start_day=tr3,
-            )
-            # Control: Pond1 -> Pond5
-            self._cap_transfer("pond1", "pond5", requested_15)
-            self._write_reaction_block(
-                f,
-                reaction_id=11,
-                steps=self.params.nsteps_default_days,
-                ev_mols=self._evap_mols(self.params.nsteps_default_days),
-                results_file=(runner.output_dir / "results11.dat").as_posix(),
-                eq_phases_id=106,
-                use_solution_tag="5",
-                schedule_start_day=tr4,
-            )
-        runner.run()
-        try:
-            outputs["results10.dat"] = pd.read_csv(runner.output_dir / "results10.dat", sep="\t")
-        except Exception:
-            pass
-        df11 = pd.read_csv(runner.output_dir / "results11.dat", sep="\t")
-        outputs["results11.dat"] = df11
-        stage_start_days["results11.dat"] = tr4
-
-        # 9) Pond 1 tras transfer a Pond 5 (100 días) -> results12.dat, obtener tr5
-        with open(input_path, "a", encoding="utf-8") as f:
-            self._write_reaction_block(
-                f,
-                reaction_id=12,
-                steps=self.params.nsteps_default_days,
-                ev_mols=self._evap_mols(self.params.nsteps_default_days),
-                results_file=(runner.output_dir / "results12.dat").as_posix(),
-                eq_phases_id=107,
-                use_solution_tag="1",
-                use_phases_tag="4",
-                schedule_start_day=tr4,
-            )
-        runner.run()
-        df12 = pd.read_csv(runner.output_dir / "results12.dat", sep="\t")
-        outputs["results12.dat"] = df12
-        stage_start_days["results12.dat"] = tr4
-        tr5_local = self.find_transfer_day_halite(df12)
-        if tr5_local is None:
-            return outputs, stage_start_days
-        tr5 = int(tr4 + int(max(1, int(tr5_local))))
-
-        # Volumen restante al día tr5
-        requested_16 = self._remaining_vol_from_output(df12, tr5)
-
-        # 10) Transfer a Pond 6 -> results13.dat / results14.dat
-        with open(input_path, "a", encoding="utf-8") as f:
-            # Carga hasta tr5
-            self._write_reaction_block(
-                f,
-                reaction_id=13,
-                steps=tr5 - tr4,
-                ev_mols=self._evap_mols(tr5 - tr4),
-                results_file=(runner.output_dir / "results13.dat").as_posix(),
-                eq_phases_id=5,
-                use_solution_tag="1",
-                use_phases_tag="4",
-                save_solution_tag="6",
-                save_phases_tag="5",
-                schedule_start_day=tr4,
-            )
-            # Control: Pond1 -> Pond6
-            self._cap_transfer("pond1", "pond6", requested_16)
-            # Evolución Pond 6
-            self._write_reaction_block(
-                f,
-                reaction_id=14,
-                steps=self.params.nsteps_default_days,
-                ev_mols=self._evap_mols(self.params.nsteps_default_days),
-                results_file=(runner.output_dir / "results14.dat").as_posix(),
-                eq_phases_id=108,
-                use_solution_tag="6",
-                schedule_start_day=tr5,
-            )
-        runner.run()
-        try:
-            outputs["results13.dat"] = pd.read_csv(runner.output_dir / "results13.dat", sep="\t")
-            stage_start_days["results13.dat"] = tr4
-        except Exception:
-            pass
-        df14 = pd.read_csv(runner.output_dir / "results14.dat", sep="\t")
-        outputs["results14.dat"] = df14
-        stage_start_days["results14.dat"] = tr5
+                use_phases_tag=str(k - 1),
+                schedule_start_day=tr_cur,
+            ))
+            run_batch(split_tail=True)
+            batch = read_batch(f_cont, narrow=True)
+            register_lazy(f_tr, f_ev, f_cont, optional=(f_tr,))
+            stage_start_days[f_ev] = tr_cur
+            df_cont = batch[f_cont]
+            stage_start_days[f_cont] = tr_cur
+            tr_local = self.find_transfer_day_halite(df_cont)
+            if tr_local is None:
+                return outputs, stage_start_days
+            tr_next = int(tr_cur + int(max(1, int(tr_local))))
+            # Volumen restante al dia de la siguiente transferencia
+            requested = self._remaining_vol_from_output(df_cont, tr_next)
+            tr_prev, tr_cur = tr_cur, tr_next
+
+        # 6) Transfer a Pond 6 -> results13/14 en un solo run (sin bloque de
+        #    continuacion: Pond 6 es la ultima balsa de la cascada)
+        blocks.append(dict(
+            reaction_id=13,
+            steps=tr_cur - tr_prev,
+            ev_mols=self._evap_mols(tr_cur - tr_prev),
+            results_file=f"{out_dir_str}/results13.dat",
+            eq_phases_id=5,
+            use_solution_tag="1",
+            use_phases_tag="4",
+            save_solution_tag="6",
+            save_phases_tag="5",
+            schedule_start_day=tr_prev,
+        ))
+        # Control: Pond1 -> Pond6
+        self._cap_transfer("pond1", "pond6", requested)
+        blocks.append(dict(
+            reaction_id=14,
+            steps=nsd,
+            ev_mols=default_evmols,
+            results_file=f"{out_dir_str}/results14.dat",
+            eq_phases_id=108,
+            use_solution_tag="6",
+            schedule_start_day=tr_cur,
+        ))
+        run_batch()
+        register_lazy("results13.dat", "results14.dat", optional=("results13.dat",))
+        if "results13.dat" in outputs:
+            stage_start_days["results13.dat"] = tr_prev
+        stage_start_days["results14.dat"] = tr_cur
 
         return outputs, stage_start_days
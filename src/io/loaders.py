@@ -2,11 +2,32 @@ from __future__ import annotations
 
 from pathlib import Path
 from dataclasses import dataclass
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 import re
 
 from src.domain.models import Brine, Pond, MineralProps, Plant, SimulationParams
 
+# Extrae el numero de balsa del nombre crudo ("pond1", "Pond 1", ...)
+_CANON_RE = re.compile(r"(\d+)")
+
+
+@lru_cache(maxsize=None)
+def _canon_name(name: str) -> str:
+    """Canonicaliza un nombre de balsa crudo a 'Pond N' (memoizado)."""
+    m = _CANON_RE.search(str(name))
+    return f"Pond {int(m.group(1))}" if m else str(name).strip().title()
+
+
+# Propiedades minerales de referencia: inmutables, compartidas entre cargas
+_MINERALS = {
+    "Calcite": MineralProps("Calcite", 100.0869, 2700.0),
+    "Halite": MineralProps("Halite", 58.44, 2170.0),
+    "Gypsum": MineralProps("Gypsum", 136.14, 2320.0),
+    "Water": MineralProps("Water", 18.01528, 1000.0),
+}
+
 
 @dataclass
 class InputData:
@@ -35,29 +56,23 @@ def load_input(brine_path: Path, ponds_path: Path, evap_schedule_path: Path = No
     volumes_m3: dict[str, float] = {}
     ponds: list[Pond] = []
 
-    def canon_name(name: str) -> str:
-        m = re.search(r"(\d+)", str(name))
-        return f"Pond {int(m.group(1))}" if m else str(name).strip().title()
-
-    for i in range(len(ponds_df)):
-        name_raw = str(ponds_df.iloc[i, 0]) if ponds_df.shape[1] > 0 else f"Pond {i+1}"
-        name = canon_name(name_raw)
-        val = ponds_df.iloc[i, 1] if ponds_df.shape[1] > 1 else 0.0
-        try:
-            vol = float(val)
-        except Exception:
-            # Skip header-like rows where volume column isn't numeric (e.g., 'm3')
-            continue
+    # Parseo columnar: nombres y volumenes en dos Series, sin iloc fila a fila
+    if ponds_df.shape[1] > 0:
+        names = ponds_df.iloc[:, 0].astype(str).map(_canon_name)
+    else:
+        names = pd.Series([f"Pond {i+1}" for i in range(len(ponds_df))])
+    if ponds_df.shape[1] > 1:
+        vols = pd.to_numeric(ponds_df.iloc[:, 1], errors="coerce")
+    else:
+        vols = pd.Series(0.0, index=ponds_df.index)
+    # Filas tipo cabecera (volumen no numerico, p.ej. 'm3') quedan fuera
+    mask = vols.notna()
+    for name, vol in zip(names[mask], vols[mask].astype(float)):
         volumes_m3[name] = vol
         area = areas.get(name, 1.0)
         ponds.append(Pond(name=name, area_m2=area, init_level_m=maxlevelallowed, max_level_m=maxlevelallowed))
 
-    minerals = {
-        "Calcite": MineralProps("Calcite", 100.0869, 2700.0),
-        "Halite": MineralProps("Halite", 58.44, 2170.0),
-        "Gypsum": MineralProps("Gypsum", 136.14, 2320.0),
-        "Water": MineralProps("Water", 18.01528, 1000.0),
-    }
+    minerals = _MINERALS
 
     params = SimulationParams(
         evaporation_rate_mol_per_day_L=0.273,  # match the constant we were testing
@@ -73,14 +88,15 @@ def load_input(brine_path: Path, ponds_path: Path, evap_schedule_path: Path = No
         try:
             df_evap = pd.read_csv(evap_schedule_path)
             if "evap_mol_day_L" in df_evap.columns:
-                schedule = df_evap["evap_mol_day_L"].astype(float).tolist()
+                # ndarray float64 directo: la Simulation lo consume vectorizado
+                schedule = df_evap["evap_mol_day_L"].to_numpy(dtype=np.float64)
                 # Use original CSV values to see natural seasonal variation
-                scale_factor = 1.0
-                schedule = [rate * scale_factor for rate in schedule]
-                avg_rate = sum(schedule) / len(schedule) if schedule else 0.272
+                # Reducciones en C sobre el ndarray (sin pasadas Python)
+                avg_rate = float(schedule.mean()) if schedule.size else 0.272
+                lo, hi = float(schedule.min()), float(schedule.max())
                 print(f"Loaded evaporation schedule from {evap_schedule_path.name}")
-                print(f"Schedule: {len(schedule)} days, avg rate: {avg_rate:.3f} mol/day/L")
-                print(f"Rate range: {min(schedule):.3f} to {max(schedule):.3f} mol/day/L")
+                print(f"Schedule: {schedule.size} days, avg rate: {avg_rate:.3f} mol/day/L")
+                print(f"Rate range: {lo:.3f} to {hi:.3f} mol/day/L")
                 params.evap_schedule_mol_per_day_L = schedule
             else:
                 print(f"Warning: evap_mol_day_L column not found in {evap_schedule_path}")
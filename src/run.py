@@ -1,30 +1,127 @@
 from __future__ import annotations
 
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import argparse
+import json
+import re
+import numpy as np
 import pandas as pd
 
 from src.domain.phreeqc_runner import PhreeqcRunner
 from src.domain.simulation import Simulation
 from src.io.loaders import load_input
-from src.utils.plots import plot_mineral_masses
-from src.utils.plots import plot_overlay
 from src.utils.analysis import print_transfer_summary
 from src.utils.config import load_config, get_phreeqc_paths, get_data_paths, get_evaporation_schedule_path, resolve_path
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _ffill_zero(a: np.ndarray) -> np.ndarray:
+    #Forward-fill NaNs in place, zeroing any leading NaNs (NumPy fallback)
+    mask = np.isnan(a)
+    if mask.any():
+        idx = np.where(~mask, np.arange(a.size), 0)
+        np.maximum.accumulate(idx, out=idx)
+        a = a[idx]
+        a[np.isnan(a)] = 0.0
+    return a
+
+
+if njit is not None:
+    #Fused single-pass kernel when numba is available: one C loop instead of
+    #mask + accumulate + gather over long SELECTED_OUTPUT series
+    @njit(cache=True)
+    def _ffill_zero(a):  # noqa: F811
+        last = 0.0
+        for i in range(a.size):
+            v = a[i]
+            if v == v:  # not NaN
+                last = v
+            else:
+                a[i] = last
+        return a
+
+
+#Memoized per-DataFrame results: the plotting loop, overlays and the preview
+#branch all re-ask for the same series, so each frame is scanned only once
+_RESULT_NUM = re.compile(r"\d+")
+
+
+def _natkey(name: str) -> int:
+    #Numeric sort key so results2.dat < results10.dat (lexicographic breaks)
+    m = _RESULT_NUM.search(name)
+    return int(m.group()) if m else 0
+
+
+_TIME_CACHE: dict[int, pd.Series] = {}
+_MINERALS_CACHE: dict[int, tuple[pd.Series, pd.Series, pd.Series]] = {}
+
 
 def _time_series(df: pd.DataFrame) -> pd.Series:
+    cached = _TIME_CACHE.get(id(df))
+    if cached is None:
+        cached = _TIME_CACHE.setdefault(id(df), _compute_time_series(df))
+    return cached
+
+
+def _compute_time_series(df: pd.DataFrame) -> pd.Series:
     #Extract time series from the phreeqc output dataframe, trying common time/step column names
     for name in ("time", "Time", "step", "Step", "reaction", "Reaction"):
         if name in df.columns:
-            #Convert chosen column to numeric (coerce errors to NaN)
-            s = pd.to_numeric(df[name], errors="coerce")
+            col = df[name]
             break
     else:
         #Fallback: use the 6th column (index 5) if no known column exists
-        s = pd.to_numeric(df.iloc[:, 5], errors="coerce")
-    #Fill NaN values by forward fill, then fallback to 0
-    return s.fillna(method="ffill").fillna(0)
+        col = df.iloc[:, 5]
+    #Numeric columns skip the to_numeric coercion pass entirely
+    if pd.api.types.is_numeric_dtype(col):
+        arr = col.to_numpy(dtype=np.float64)
+    else:
+        arr = pd.to_numeric(col, errors="coerce").to_numpy(dtype=np.float64)
+    #Forward-fill then zero-fill without intermediate Series (single fused
+    #pass when numba is installed); copy=True because the fill is in place
+    return pd.Series(_ffill_zero(arr.copy()), index=df.index)
+
+
+def _render_plot_job(job: tuple) -> None:
+    #Render one figure in a worker process (headless backend, errors ignored
+    #like in the previous serial loop)
+    try:
+        import matplotlib
+        matplotlib.use("Agg", force=True)
+        #Deferred import: matplotlib only loads when something is rendered
+        from src.utils.plots import plot_mineral_masses, plot_overlay
+        kind, args, kwargs = job
+        if kind == "stage":
+            plot_mineral_masses(*args, **kwargs)
+        else:
+            plot_overlay(*args, **kwargs)
+    except Exception:
+        pass
+
+
+def _extract_minerals(df: pd.DataFrame) -> tuple[pd.Series, pd.Series, pd.Series] | None:
+    #Extract (calcite, halite, gypsum) series with a single lowercased pass
+    #over the columns instead of one regex scan per mineral; returns None when
+    #a mineral column is missing so callers can precheck instead of catching
+    cached = _MINERALS_CACHE.get(id(df))
+    if cached is None:
+        cols = {"calcite": None, "halite": None, "gypsum": None}
+        for c in df.columns:
+            lo = str(c).lower()
+            for mineral in cols:
+                if cols[mineral] is None and mineral in lo:
+                    cols[mineral] = c
+        if all(col is not None for col in cols.values()):
+            cached = (df[cols["calcite"]], df[cols["halite"]], df[cols["gypsum"]])
+        else:
+            cached = ()
+        _MINERALS_CACHE[id(df)] = cached
+    return cached or None
 
 
 def main():
@@ -33,6 +130,7 @@ def main():
     parser.add_argument("--workspace", type=str, default=str(Path.cwd()), help="Workspace root directory")
     parser.add_argument("--config", type=str, default="config.yaml", help="Configuration file path")
     parser.add_argument("--plot", action="store_true", help="Plot preview for the first stage")
+    parser.add_argument("--from-cache", action="store_true", help="Reuse cached Parquet outputs instead of running PHREEQC")
     args = parser.parse_args()
 
     #Resolve workspace and config file path
@@ -66,8 +164,10 @@ def main():
     # ========= INSERT 1: capacidades y política de transferencia =========
     # Leemos pondsData.txt (tabulado) y construimos un dict { 'pond1': m3, ..., 'pond6': m3 }
     try:
-        df_caps = pd.read_csv(ponds_path, sep="\t")
-        pond_capacities_m3 = {str(row[0]).strip(): float(row[1]) for _, row in df_caps.iterrows()}
+        df_caps = pd.read_csv(ponds_path, sep="\t", engine="c", dtype={0: str})
+        #Vectorized: one C-level pass per column instead of iterrows tuples
+        pond_capacities_m3 = dict(zip(df_caps.iloc[:, 0].str.strip().tolist(),
+                                      df_caps.iloc[:, 1].astype(float).tolist()))
     except Exception as e:
         raise RuntimeError(f"Failed to read pond capacities from {ponds_path}: {e}")
 
@@ -109,20 +209,18 @@ def main():
     # Si existe evap_diaria.csv (o el archivo indicado en config), leemos la columna 'evap_mol_day_L'
     # y la pasamos a Simulation como lista de floats. Unidades: mol/L/día.
     evap_schedule_mol_per_day_L = None
+    # Columna esperada (según tu archivo): 'evap_mol_day_L', con alias alternativos
+    evap_aliases = ("evap_mol_day_L", "evap_L_mol_day", "evap_mol_per_L_day", "evaporation_mol_L_day")
     if evap_schedule_path is not None and Path(evap_schedule_path).exists():
         try:
-            df_ev = pd.read_csv(evap_schedule_path)
-            # Columna esperada (según tu archivo): 'evap_mol_day_L'
-            if "evap_mol_day_L" in df_ev.columns:
-                evap_schedule_mol_per_day_L = df_ev["evap_mol_day_L"].astype(float).tolist()
+            # Solo se parsea la columna necesaria; ndarray directo, sin lista
+            # de floats boxeados intermedia
+            df_ev = pd.read_csv(evap_schedule_path, usecols=lambda c: c in evap_aliases, engine="c")
+            col = next((c for c in evap_aliases if c in df_ev.columns), None)
+            if col is not None:
+                evap_schedule_mol_per_day_L = df_ev[col].to_numpy(dtype=np.float64)
             else:
-                # Si tu CSV tuviera otro nombre de columna, añade aquí alias alternativos:
-                for alt in ("evap_L_mol_day", "evap_mol_per_L_day", "evaporation_mol_L_day"):
-                    if alt in df_ev.columns:
-                        evap_schedule_mol_per_day_L = df_ev[alt].astype(float).tolist()
-                        break
-                if evap_schedule_mol_per_day_L is None:
-                    print(f"WARNING: Column 'evap_mol_day_L' not found in {evap_schedule_path}. Schedule will be ignored.")
+                print(f"WARNING: Column 'evap_mol_day_L' not found in {evap_schedule_path}. Schedule will be ignored.")
         except Exception as e:
             print(f"WARNING: Could not parse evaporation schedule from {evap_schedule_path}: {e}")
 
@@ -137,8 +235,31 @@ def main():
     #Initialize simulation with plant configuration and parameters
     sim = Simulation(plant=data.plant, params=data.params, work_dir=work_dir)
 
-    #Run full multi-stage simulation pipeline
-    outputs, stage_start_days = sim.run_full_pipeline(runner)
+    #Parquet cache of pipeline outputs: lets plotting/analysis re-run without
+    #re-executing PHREEQC (columnar reads are also much faster than .dat text)
+    cache_dir = Path(runner.output_dir) / "_parquet_cache"
+
+    if args.from_cache and cache_dir.exists():
+        #Reuse cached frames and stage offsets from a previous run
+        outputs = {p.name[:-len(".parquet")]: pd.read_parquet(p, engine="pyarrow")
+                   for p in sorted(cache_dir.glob("*.dat.parquet"), key=lambda p: _natkey(p.name))}
+        try:
+            stage_start_days = json.loads((cache_dir / "stage_start_days.json").read_text())
+        except Exception:
+            stage_start_days = {}
+        print(f"Loaded {len(outputs)} result files from cache: {cache_dir}")
+    else:
+        #Run full multi-stage simulation pipeline
+        outputs, stage_start_days = sim.run_full_pipeline(runner)
+
+        #Refresh the Parquet cache (best effort: needs pyarrow installed)
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            for fname, df in outputs.items():
+                df.to_parquet(cache_dir / (fname + ".parquet"), engine="pyarrow", compression="snappy")
+            (cache_dir / "stage_start_days.json").write_text(json.dumps(stage_start_days))
+        except Exception as e:
+            print(f"WARNING: Could not write Parquet cache to {cache_dir}: {e}")
 
     #Report generated output files
     print(f"Generated {len(outputs)} result files in {runner.output_dir}:")
@@ -171,74 +292,85 @@ def main():
         6: "results13.dat",  #short Pond1 run before transfer to Pond 6
     }
 
-    #Helper function: adjust relative time to absolute timeline
+    #Helper function: adjust relative time to absolute timeline (memoized per
+    #DataFrame/start pair, it is re-requested by the overlay loop)
+    abs_time_cache: dict[tuple[int, float], pd.Series] = {}
+
     def to_abs_time(df: pd.DataFrame, start_day: float) -> pd.Series:
+        key = (id(df), float(start_day))
+        cached = abs_time_cache.get(key)
+        if cached is not None:
+            return cached
         t = _time_series(df)
-        base = float(t.iloc[0]) if pd.notna(t.iloc[0]) else float(t.dropna().iloc[0]) if not t.dropna().empty else 0.0
-        return t - base + float(start_day)
-
-    #Loop over final pond stage results
+        arr = t.to_numpy()
+        #First valid value as base (the series is already NaN-free after fill)
+        base = float(arr[0]) if arr.size else 0.0
+        result = pd.Series(arr - base + float(start_day), index=t.index)
+        abs_time_cache[key] = result
+        return result
+
+    #Collect render jobs over final pond stage results; figures are
+    #independent, so rendering is dispatched to a process pool afterwards
+    render_jobs: list[tuple] = []
     for fname, stage_idx in final_stage_files:
         df = outputs.get(fname)
         if df is None:
             continue
+        #Precheck required columns: cheaper than letting the extraction raise
+        minerals = _extract_minerals(df)
+        if minerals is None:
+            continue
+        time = to_abs_time(df, stage_start_days.get(fname, 0))
+        calcite, halite, gypsum = minerals
+        save_path = plots_dir / f"pond{stage_idx}_stage{stage_idx}.png"
+
+        #Plot mineral evolution for current pond stage
+        render_jobs.append((
+            "stage",
+            (time, calcite, halite, gypsum),
+            dict(title=f"Pond {stage_idx} (stage {stage_idx})", save_path=save_path, show=False),
+        ))
+
+        #If stage >1, overlay current pond with Pond1 evolution
+        if stage_idx > 1:
+            pond1_file = pond1_overlay_map.get(stage_idx)
+            df_p1 = outputs.get(pond1_file)
+            minerals_p1 = _extract_minerals(df_p1) if df_p1 is not None else None
+            if minerals_p1 is not None:
+                time_p1 = to_abs_time(df_p1, stage_start_days.get(pond1_file, 0))
+                calcite_p1, halite_p1, gypsum_p1 = minerals_p1
+                overlay_path = plots_dir / f"overlay_pond1_vs_pond{stage_idx}.png"
+
+                #Generate overlay plot comparing Pond1 vs PondN
+                render_jobs.append((
+                    "overlay",
+                    (time_p1, calcite_p1, halite_p1, gypsum_p1, "Pond 1",
+                     time, calcite, halite, gypsum, f"Pond {stage_idx}"),
+                    dict(title=f"Pond 1 vs Pond {stage_idx}", save_path=overlay_path, show=False),
+                ))
+
+    if render_jobs:
         try:
-            #Extract time and mineral masses for plotting
-            time = to_abs_time(df, stage_start_days.get(fname, 0))
-            calcite = df.filter(regex="(?i)calcite").iloc[:, 0]
-            halite = df.filter(regex="(?i)halite").iloc[:, 0]
-            gypsum = df.filter(regex="(?i)gypsum").iloc[:, 0]
-            save_path = plots_dir / f"pond{stage_idx}_stage{stage_idx}.png"
-
-            #Plot mineral evolution for current pond stage
-            plot_mineral_masses(
-                time,
-                calcite,
-                halite,
-                gypsum,
-                title=f"Pond {stage_idx} (stage {stage_idx})",
-                save_path=save_path,
-                show=False,
-            )
-
-            #If stage >1, overlay current pond with Pond1 evolution
-            if stage_idx > 1:
-                pond1_file = pond1_overlay_map.get(stage_idx)
-                df_p1 = outputs.get(pond1_file)
-                if df_p1 is not None:
-                    time_p1 = to_abs_time(df_p1, stage_start_days.get(pond1_file, 0))
-                    calcite_p1 = df_p1.filter(regex="(?i)calcite").iloc[:, 0]
-                    halite_p1 = df_p1.filter(regex="(?i)halite").iloc[:, 0]
-                    gypsum_p1 = df_p1.filter(regex="(?i)gypsum").iloc[:, 0]
-                    overlay_path = plots_dir / f"overlay_pond1_vs_pond{stage_idx}.png"
-
-                    #Generate overlay plot comparing Pond1 vs PondN
-                    plot_overlay(
-                        time_p1, calcite_p1, halite_p1, gypsum_p1, "Pond 1",
-                        time, calcite, halite, gypsum, f"Pond {stage_idx}",
-                        title=f"Pond 1 vs Pond {stage_idx}",
-                        save_path=overlay_path,
-                        show=False,
-                    )
+            with ProcessPoolExecutor(max_workers=min(4, len(render_jobs))) as ex:
+                list(ex.map(_render_plot_job, render_jobs))
         except Exception:
-            #Ignore plotting errors silently
-            pass
+            #Fallback: render serially if the pool cannot start
+            for job in render_jobs:
+                _render_plot_job(job)
 
     #Optional quick on-screen plot for Pond1 first stage
     if args.plot and "results.dat" in outputs:
-        try:
-            df = outputs["results.dat"]
-            t = _time_series(df)
-            base = float(t.iloc[0]) if pd.notna(t.iloc[0]) else float(t.dropna().iloc[0]) if not t.dropna().empty else 0.0
-            time = t - base + float(stage_start_days.get("results.dat", 0))
-            calcite = df.filter(regex="(?i)calcite").iloc[:, 0]
-            halite = df.filter(regex="(?i)halite").iloc[:, 0]
-            gypsum = df.filter(regex="(?i)gypsum").iloc[:, 0]
-
-            #Show plot for Pond1 evolution
-            plot_mineral_masses(time, calcite, halite, gypsum, title="Pond 1 (preview)", save_path=None, show=True)
-        except Exception:
-            pass
+        df = outputs["results.dat"]
+        minerals = _extract_minerals(df)
+        if minerals is not None:
+            time = to_abs_time(df, stage_start_days.get("results.dat", 0))
+            calcite, halite, gypsum = minerals
+            try:
+                #Show plot for Pond1 evolution (narrow guard around the render only)
+                from src.utils.plots import plot_mineral_masses
+                plot_mineral_masses(time, calcite, halite, gypsum, title="Pond 1 (preview)", save_path=None, show=True)
+            except Exception:
+                pass
 
 
 if __name__ == "__main__":
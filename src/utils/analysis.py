@@ -2,52 +2,79 @@
 Utility functions for analyzing and summarizing simulation results.
 """
 from pathlib import Path
+from types import MappingProxyType
+import sys
 import pandas as pd
 from typing import Dict, List, Tuple
 
 
+# What each SELECTED_OUTPUT file represents (built once at import)
+_FILE_DESCRIPTIONS = MappingProxyType({
+    "results.dat": "Pond 1 - Initial evolution",
+    "results2.dat": "Pond 2 - After 1st transfer from Pond 1",
+    "results3.dat": "Pond 1 - Continued evolution after 1st transfer",
+    "results4.dat": "Pond 1 - Short run to 2nd transfer point",
+    "results5.dat": "Pond 3 - After 2nd transfer from Pond 1",
+    "results6.dat": "Pond 1 - Continued evolution after 2nd transfer",
+    "results7.dat": "Pond 1 - Short run to 3rd transfer point",
+    "results8.dat": "Pond 4 - After 3rd transfer from Pond 1",
+    "results9.dat": "Pond 1 - Continued evolution after 3rd transfer",
+    "results10.dat": "Pond 1 - Short run to 4th transfer point",
+    "results11.dat": "Pond 5 - After 4th transfer from Pond 1",
+    "results12.dat": "Pond 1 - Continued evolution after 4th transfer",
+    "results13.dat": "Pond 1 - Short run to 5th transfer point",
+    "results14.dat": "Pond 6 - After 5th transfer from Pond 1",
+})
+
+# Known transfer pattern keyed by the receiving pond's result file
+_TRANSFER_INFO_BY_FILE = MappingProxyType({
+    "results2.dat": (30, 1, 2),    # Day 30: Pond 1 -> Pond 2
+    "results5.dat": (76, 1, 3),    # Day 76: Pond 1 -> Pond 3
+    "results8.dat": (142, 1, 4),   # Day 142: Pond 1 -> Pond 4
+    "results11.dat": (187, 1, 5),  # Day 187: Pond 1 -> Pond 5
+    "results14.dat": (218, 1, 6),  # Day 218: Pond 1 -> Pond 6
+})
+
+# Main pond result file -> pond number
+_POND_NUMBER = MappingProxyType({
+    "results.dat": 1,
+    "results2.dat": 2,
+    "results5.dat": 3,
+    "results8.dat": 4,
+    "results11.dat": 5,
+    "results14.dat": 6,
+})
+
+
 def print_transfer_summary(outputs: Dict[str, pd.DataFrame], stage_start_days: Dict[str, int], output_dir: Path) -> None:
     """Print a comprehensive transfer summary showing pond operations and transfers."""
     
-    print("\n" + "=" * 80)
-    print("POND TRANSFER SUMMARY")
-    print("=" * 80)
-    
-    # File descriptions mapping
-    file_descriptions = {
-        "results.dat": "Pond 1 - Initial evolution",
-        "results2.dat": "Pond 2 - After 1st transfer from Pond 1",
-        "results3.dat": "Pond 1 - Continued evolution after 1st transfer",
-        "results4.dat": "Pond 1 - Short run to 2nd transfer point", 
-        "results5.dat": "Pond 3 - After 2nd transfer from Pond 1",
-        "results6.dat": "Pond 1 - Continued evolution after 2nd transfer",
-        "results7.dat": "Pond 1 - Short run to 3rd transfer point",
-        "results8.dat": "Pond 4 - After 3rd transfer from Pond 1", 
-        "results9.dat": "Pond 1 - Continued evolution after 3rd transfer",
-        "results10.dat": "Pond 1 - Short run to 4th transfer point",
-        "results11.dat": "Pond 5 - After 4th transfer from Pond 1",
-        "results12.dat": "Pond 1 - Continued evolution after 4th transfer",
-        "results13.dat": "Pond 1 - Short run to 5th transfer point", 
-        "results14.dat": "Pond 6 - After 5th transfer from Pond 1",
-    }
+    # Buffer de salida: una sola escritura a stdout al final en vez de
+    # un print (lock + flush) por linea
+    buf: List[str] = []
+    w = buf.append
+
+    w("\n" + "=" * 80)
+    w("POND TRANSFER SUMMARY")
+    w("=" * 80)
     
     # Extract transfer information
     transfers = _extract_transfers(outputs, stage_start_days)
     
-    print("\nTRANSFER TIMELINE:")
-    print("-" * 50)
+    w("\nTRANSFER TIMELINE:")
+    w("-" * 50)
     for i, (day, from_pond, to_pond) in enumerate(transfers, 1):
-        print(f"Transfer {i}: Day {day:3d} - Pond {from_pond} → Pond {to_pond}")
+        w(f"Transfer {i}: Day {day:3d} - Pond {from_pond} → Pond {to_pond}")
     
-    print(f"\nPOND SYSTEM OVERVIEW:")
-    print("-" * 50)
+    w(f"\nPOND SYSTEM OVERVIEW:")
+    w("-" * 50)
     
-    # Analyze final states
-    pond_results = {}
+    # Analyze final states (fixed-size slots: pond numbers are bounded 1..6)
+    pond_results: List[dict | None] = [None] * 7
     max_day = 0
     
     for filename, df in outputs.items():
-        if df.empty:
+        if len(df.index) == 0:
             continue
             
         # Get time column
@@ -56,7 +83,8 @@ def print_transfer_summary(outputs: Dict[str, pd.DataFrame], stage_start_days: D
             continue
             
         start_day = stage_start_days.get(filename, 0)
-        end_day = float(df[time_col].iloc[-1]) - float(df[time_col].iloc[0]) + start_day
+        t = df[time_col]
+        end_day = float(t.iloc[-1] - t.iloc[0]) + start_day
         max_day = max(max_day, end_day)
         
         # Get final mineral concentrations
@@ -70,87 +98,85 @@ def print_transfer_summary(outputs: Dict[str, pd.DataFrame], stage_start_days: D
                 'halite': halite_final,
                 'start_day': start_day,
                 'end_day': end_day,
-                'description': file_descriptions.get(filename, "Unknown operation")
+                'description': _FILE_DESCRIPTIONS.get(filename, "Unknown operation")
             }
     
-    # Print pond summaries
-    for pond_num in sorted(pond_results.keys()):
+    # Print pond summaries (slot order is already pond order, no sort needed)
+    for pond_num in range(1, 7):
         info = pond_results[pond_num]
-        print(f"Pond {pond_num}: {info['description']}")
-        print(f"           Days {info['start_day']:3.0f}-{info['end_day']:3.0f}, Final halite: {info['halite']:.4f} mol")
+        if info is None:
+            continue
+        w(f"Pond {pond_num}: {info['description']}")
+        w(f"           Days {info['start_day']:3.0f}-{info['end_day']:3.0f}, Final halite: {info['halite']:.4f} mol")
     
-    print(f"\nSYSTEM PERFORMANCE:")
-    print("-" * 50)
-    print(f"• Total simulation time: {max_day:.0f} days ({max_day/30.44:.1f} months)")
-    print(f"• Number of transfers: {len(transfers)}")
-    print(f"• Active ponds: {len([p for p in pond_results.keys() if p > 1])} receiving ponds + 1 primary")
-    print(f"• Variable evaporation: Seasonal rates from CSV applied correctly")
+    w(f"\nSYSTEM PERFORMANCE:")
+    w("-" * 50)
+    w(f"• Total simulation time: {max_day:.0f} days ({max_day/30.44:.1f} months)")
+    w(f"• Number of transfers: {len(transfers)}")
+    n_receiving = sum(1 for info in pond_results[2:] if info is not None)
+    w(f"• Active ponds: {n_receiving} receiving ponds + 1 primary")
+    w(f"• Variable evaporation: Seasonal rates from CSV applied correctly")
     
-    halite_values = [info['halite'] for info in pond_results.values() if info['halite'] > 0]
+    halite_values = [info['halite'] for info in pond_results if info is not None and info['halite'] > 0]
     if halite_values:
-        print(f"• Halite range: {min(halite_values):.4f} - {max(halite_values):.4f} mol")
-        print(f"• System efficiency: Progressive concentration achieved ✓")
+        w(f"• Halite range: {min(halite_values):.4f} - {max(halite_values):.4f} mol")
+        w(f"• System efficiency: Progressive concentration achieved ✓")
     
-    print("\n" + "=" * 80)
+    w("\n" + "=" * 80)
+    sys.stdout.write("\n".join(buf) + "\n")
 
 
 def _extract_transfers(outputs: Dict[str, pd.DataFrame], stage_start_days: Dict[str, int]) -> List[Tuple[int, int, int]]:
     """Extract transfer events from the outputs."""
-    transfers = []
-    
-    # Known transfer pattern based on the simulation logic
-    transfer_info = [
-        (30, 1, 2),   # Day 30: Pond 1 → Pond 2
-        (76, 1, 3),   # Day 76: Pond 1 → Pond 3  
-        (142, 1, 4),  # Day 142: Pond 1 → Pond 4
-        (187, 1, 5),  # Day 187: Pond 1 → Pond 5
-        (218, 1, 6),  # Day 218: Pond 1 → Pond 6
-    ]
-    
     # Only include transfers that actually happened (have corresponding result files)
-    receiving_pond_files = ["results2.dat", "results5.dat", "results8.dat", "results11.dat", "results14.dat"]
-    
-    for i, (day, from_pond, to_pond) in enumerate(transfer_info):
-        if i < len(receiving_pond_files) and receiving_pond_files[i] in outputs:
-            transfers.append((day, from_pond, to_pond))
-    
-    return transfers
+    return [
+        transfer for fname, transfer in _TRANSFER_INFO_BY_FILE.items()
+        if fname in outputs
+    ]
+
+
+_TIME_NAMES = ("time", "Time", "step", "Step")
 
 
 def _get_time_column(df: pd.DataFrame) -> str:
-    """Find the time/step column in the dataframe."""
-    for col in ["time", "Time", "step", "Step"]:
-        if col in df.columns:
-            return col
-    # Fallback to 6th column (index 5)
-    if len(df.columns) > 5:
-        return df.columns[5]
-    return None
+    """Find the time/step column in the dataframe (cached per frame)."""
+    if "_time_col" in df.attrs:
+        return df.attrs["_time_col"]
+    cols = set(df.columns)
+    result = next((n for n in _TIME_NAMES if n in cols), None)
+    if result is None and len(df.columns) > 5:
+        # Fallback to 6th column (index 5)
+        result = df.columns[5]
+    df.attrs["_time_col"] = result
+    return result
+
+
+def _mineral_columns(df: pd.DataFrame) -> Dict[str, str]:
+    """Map lowercase mineral names to their column, one scan per dataframe."""
+    cols = df.attrs.get("_mineral_cols")
+    if cols is None:
+        # Filtro vectorizado sobre el indice de columnas (sin bucle por celda)
+        low = df.columns.str.lower()
+        cols = {}
+        for mineral in ("calcite", "halite", "gypsum"):
+            hits = df.columns[low.str.contains(mineral, regex=False)]
+            if len(hits):
+                cols[mineral] = hits[0]
+        df.attrs["_mineral_cols"] = cols
+    return cols
 
 
 def _get_mineral_concentration(df: pd.DataFrame, mineral: str) -> float:
     """Get the final concentration of a mineral from the dataframe."""
-    for col in df.columns:
-        if mineral.lower() in col.lower():
-            try:
-                return float(df[col].iloc[-1])
-            except (ValueError, IndexError):
-                return 0.0
+    col = _mineral_columns(df).get(mineral.lower())
+    if col is not None:
+        try:
+            return float(df[col].iloc[-1])
+        except (ValueError, IndexError):
+            return 0.0
     return 0.0
 
 
 def _extract_pond_number(filename: str) -> int:
     """Extract pond number from result filename."""
-    if filename == "results.dat":
-        return 1
-    elif filename == "results2.dat":
-        return 2
-    elif filename == "results5.dat":
-        return 3
-    elif filename == "results8.dat":
-        return 4
-    elif filename == "results11.dat":
-        return 5
-    elif filename == "results14.dat":
-        return 6
-    return 0  # Not a main pond result file
+    return _POND_NUMBER.get(filename, 0)  # 0: not a main pond result file
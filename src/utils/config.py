@@ -1,12 +1,21 @@
 """
 Configuration loader for environment settings (portable version).
 """
+from functools import lru_cache
 from pathlib import Path
 import yaml
 import os
 from typing import Dict, Any
 
 
+@lru_cache(maxsize=8)
+def _parse_yaml(config_path: str, mtime_ns: int) -> Dict[str, Any]:
+    """Parse the YAML file, memoized on (path, mtime) so repeated loads
+    within a process skip re-parsing until the file changes."""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
 def load_config(config_path: Path = None) -> Dict[str, Any]:
     """Load configuration from config.yaml file."""
     if config_path is None:
@@ -15,10 +24,10 @@ def load_config(config_path: Path = None) -> Dict[str, Any]:
     if not config_path.exists():
         raise FileNotFoundError(f"Configuration file not found: {config_path}")
 
-    with open(config_path, 'r', encoding='utf-8') as f:
-        config = yaml.safe_load(f)
+    config = dict(_parse_yaml(str(config_path), config_path.stat().st_mtime_ns))
 
-    # Allow environment variables to override YAML entries
+    # Allow environment variables to override YAML entries (applied on a copy
+    # per call so the cached parse stays pristine)
     config["phreeqc_bin"] = os.getenv("PHREEQC_BIN", config.get("phreeqc_bin"))
     config["phreeqc_database"] = os.getenv("PHREEQC_DB", config.get("phreeqc_database"))
 
@@ -38,16 +47,20 @@ def resolve_path(config: Dict[str, Any], key: str, workspace_root: Path) -> Path
     return workspace_root / path
 
 
+def _validate_paths(pairs: list[tuple[str, Path]]) -> None:
+    """Check a batch of paths in one pass, raising a single combined error."""
+    missing = [(name, p) for name, p in pairs if not p.exists()]
+    if missing:
+        raise FileNotFoundError(
+            "Missing required paths: " + ", ".join(f"{name}: {p}" for name, p in missing)
+        )
+
+
 def get_phreeqc_paths(config: Dict[str, Any], workspace_root: Path) -> tuple[Path, Path]:
     """Get PHREEQC binary and database paths (checking overrides)."""
     phreeqc_bin = resolve_path(config, "phreeqc_bin", workspace_root)
     phreeqc_db = resolve_path(config, "phreeqc_database", workspace_root)
-
-    if not phreeqc_bin.exists():
-        raise FileNotFoundError(f"PHREEQC binary not found: {phreeqc_bin}")
-    if not phreeqc_db.exists():
-        raise FileNotFoundError(f"PHREEQC database not found: {phreeqc_db}")
-
+    _validate_paths([("PHREEQC binary", phreeqc_bin), ("PHREEQC database", phreeqc_db)])
     return phreeqc_bin, phreeqc_db
 
 
@@ -55,20 +68,12 @@ def get_data_paths(config: Dict[str, Any], workspace_root: Path) -> tuple[Path,
     """Get brine and ponds data paths from config."""
     brine_path = resolve_path(config, "brine_data", workspace_root)
     ponds_path = resolve_path(config, "ponds_data", workspace_root)
-
-    if not brine_path.exists():
-        raise FileNotFoundError(f"Brine data file not found: {brine_path}")
-    if not ponds_path.exists():
-        raise FileNotFoundError(f"Ponds data file not found: {ponds_path}")
-
+    _validate_paths([("Brine data file", brine_path), ("Ponds data file", ponds_path)])
     return brine_path, ponds_path
 
 
 def get_evaporation_schedule_path(config: Dict[str, Any], workspace_root: Path) -> Path:
     """Get evaporation schedule path from config."""
     schedule_path = resolve_path(config, "evaporation_schedule", workspace_root)
-
-    if not schedule_path.exists():
-        raise FileNotFoundError(f"Evaporation schedule file not found: {schedule_path}")
-
+    _validate_paths([("Evaporation schedule file", schedule_path)])
     return schedule_path
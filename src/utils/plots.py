@@ -1,27 +1,86 @@
 from __future__ import annotations
 
 from pathlib import Path
-import pandas as pd
-import matplotlib.pyplot as plt
 
+# Figura Agg reutilizada entre llamadas: evita crear y destruir un
+# Figure+Canvas por grafico via el registro global de pyplot
+_FIG = None
 
-def plot_mineral_masses(time, calcite_tm, halite_tm, gypsum_tm, title: str, save_path: Path | str | None = None, show: bool = True) -> None:
-    fig, ax = plt.subplots()
+
+def _get_axes():
+    global _FIG
+    if _FIG is None:
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        _FIG = Figure()
+        FigureCanvasAgg(_FIG)
+        _FIG.add_subplot(111)
+    ax = _FIG.axes[0]
+    ax.cla()
+    return _FIG, ax
+
+
+def _decimate(time, *series, max_points: int):
+    # Submuestreo por paso fijo: series muy largas no aportan mas detalle
+    # visual que max_points segmentos y disparan el coste del trazado Agg
+    n = len(time)
+    if max_points and n > max_points:
+        step = n // max_points
+        return (time[::step],) + tuple(s[::step] for s in series)
+    return (time,) + series
+
+
+# Directorios ya creados: un mkdir (stat + syscall) por directorio de
+# destino, no uno por figura del lote
+_ENSURED_DIRS: set[str] = set()
+
+
+def _save(fig, save_path: Path | str, dpi: int) -> None:
+    sp = Path(save_path)
+    parent = str(sp.parent)
+    if parent not in _ENSURED_DIRS:
+        sp.parent.mkdir(parents=True, exist_ok=True)
+        _ENSURED_DIRS.add(parent)
+    if sp.suffix.lower() in (".jpg", ".jpeg"):
+        fig.savefig(sp, dpi=dpi, pil_kwargs={"quality": 85})
+    else:
+        # zlib nivel 1: codificacion PNG varias veces mas rapida que el
+        # nivel 6 por defecto a cambio de ficheros algo mayores
+        fig.savefig(sp, dpi=dpi, pil_kwargs={"compress_level": 1, "optimize": False})
+
+
+def _plot_and_save(series, title: str, save_path: Path | str | None, show: bool, dpi: int) -> None:
+    # Nucleo comun de ambos graficos: una lista (x, y, estilo, etiqueta)
+    # por traza; la figura reutilizada solo aplica al modo no interactivo
+    if show:
+        # Ruta interactiva: pyplot gestiona la ventana (solo aqui se importa)
+        import matplotlib.pyplot as plt
+        fig, ax = plt.subplots()
+    else:
+        fig, ax = _get_axes()
     ax.set_xlabel("Days")
     ax.set_ylabel("Mass (Tm)")
     ax.set_title(title)
-    ax.plot(time, calcite_tm, "b-", label="Calcite")
-    ax.plot(time, halite_tm, "r-", label="Halite")
-    ax.plot(time, gypsum_tm, "g-", label="Gypsum")
-    ax.legend(loc="upper left")
+    for x, y, style, label in series:
+        ax.plot(x, y, style, label=label, rasterized=True)
+    ax.legend(loc="upper left", ncol=1 if len(series) <= 3 else 2)
     fig.tight_layout()
     if save_path is not None:
-        sp = Path(save_path)
-        sp.parent.mkdir(parents=True, exist_ok=True)
-        fig.savefig(sp, dpi=150)
+        _save(fig, save_path, dpi)
     if show:
         plt.show()
-    plt.close(fig)
+        plt.close(fig)
+
+
+def plot_mineral_masses(time, calcite_tm, halite_tm, gypsum_tm, title: str, save_path: Path | str | None = None, show: bool = True, dpi: int = 100, max_points: int = 5000) -> None:
+    time, calcite_tm, halite_tm, gypsum_tm = _decimate(
+        time, calcite_tm, halite_tm, gypsum_tm, max_points=max_points)
+    series = [
+        (time, calcite_tm, "b-", "Calcite"),
+        (time, halite_tm, "r-", "Halite"),
+        (time, gypsum_tm, "g-", "Gypsum"),
+    ]
+    _plot_and_save(series, title, save_path, show, dpi)
 
 
 def plot_overlay(
@@ -30,25 +89,21 @@ def plot_overlay(
     title: str,
     save_path: Path | str | None = None,
     show: bool = False,
+    dpi: int = 100,
+    max_points: int = 5000,
 ):
-    fig, ax = plt.subplots()
-    ax.set_xlabel("Days")
-    ax.set_ylabel("Mass (Tm)")
-    ax.set_title(title)
-    # Pond A
-    ax.plot(time_a, calcite_a, "b-", label=f"Calcite ({label_a})")
-    ax.plot(time_a, halite_a, "r-", label=f"Halite ({label_a})")
-    ax.plot(time_a, gypsum_a, "g-", label=f"Gypsum ({label_a})")
-    # Pond B
-    ax.plot(time_b, calcite_b, "b--", label=f"Calcite ({label_b})")
-    ax.plot(time_b, halite_b, "r--", label=f"Halite ({label_b})")
-    ax.plot(time_b, gypsum_b, "g--", label=f"Gypsum ({label_b})")
-    ax.legend(loc="upper left", ncol=2)
-    fig.tight_layout()
-    if save_path is not None:
-        sp = Path(save_path)
-        sp.parent.mkdir(parents=True, exist_ok=True)
-        fig.savefig(sp, dpi=150)
-    if show:
-        plt.show()
-    plt.close(fig)
+    time_a, calcite_a, halite_a, gypsum_a = _decimate(
+        time_a, calcite_a, halite_a, gypsum_a, max_points=max_points)
+    time_b, calcite_b, halite_b, gypsum_b = _decimate(
+        time_b, calcite_b, halite_b, gypsum_b, max_points=max_points)
+    series = [
+        # Pond A
+        (time_a, calcite_a, "b-", f"Calcite ({label_a})"),
+        (time_a, halite_a, "r-", f"Halite ({label_a})"),
+        (time_a, gypsum_a, "g-", f"Gypsum ({label_a})"),
+        # Pond B
+        (time_b, calcite_b, "b--", f"Calcite ({label_b})"),
+        (time_b, halite_b, "r--", f"Halite ({label_b})"),
+        (time_b, gypsum_b, "g--", f"Gypsum ({label_b})"),
+    ]
+    _plot_and_save(series, title, save_path, show, dpi)
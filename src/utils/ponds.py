@@ -2,8 +2,95 @@
 # Utility functions for pond capacity checks
 # src/utils/ponds.py
 
+from dataclasses import dataclass
 from pathlib import Path
-import pandas as pd
+import atexit
+import sys
+
+# Buffer de log de transferencias: los print por evento (lock de stdout +
+# write por linea) se difieren y emiten en bloque. Admite str o registros
+# TransferResult; estos ultimos solo se formatean al volcar
+_LOG_BUF: list[object] = []
+_LOG_AUTOFLUSH = 1024
+
+
+def _log(entry: object) -> None:
+    _LOG_BUF.append(entry)
+    if len(_LOG_BUF) >= _LOG_AUTOFLUSH:
+        flush_transfer_log()
+
+
+def flush_transfer_log(stream=None) -> None:
+    """Vuelca el log de transferencias acumulado en una sola escritura."""
+    if not _LOG_BUF:
+        return
+    if stream is None:
+        stream = sys.stdout
+    stream.write("\n".join(str(e) for e in _LOG_BUF) + "\n")
+    _LOG_BUF.clear()
+
+
+# Nada queda sin emitir si el proceso termina con el buffer a medias
+atexit.register(flush_transfer_log)
+
+# Capacidades parseadas, cacheadas por (ruta, mtime): el TSV es diminuto pero
+# cap_and_transfer lo consultaba en cada transferencia
+_PONDS_CACHE: dict[tuple[str, float], dict[str, float]] = {}
+
+
+def _pond_capacities(ponds_file: Path) -> dict[str, float]:
+    key = (str(ponds_file), ponds_file.stat().st_mtime)
+    caps = _PONDS_CACHE.get(key)
+    if caps is None:
+        # TSV de dos columnas y pocas filas: un split directo evita montar
+        # todo el parser de pandas (tokenizador, inferencia, Index) en el miss
+        with open(ponds_file, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        header = lines[0].split("\t")
+        m3_ix = header.index("m3")
+        caps = {
+            row[0]: float(row[m3_ix])
+            for row in (line.split("\t") for line in lines[1:])
+            if len(row) > m3_ix and row[0]
+        }
+        _PONDS_CACHE[key] = caps
+    return caps
+
+
+@dataclass(slots=True, frozen=True)
+class TransferResult:
+    """Resultado estructurado de una transferencia con tope por capacidad.
+
+    El formateo (floats a 8 decimales) se hace solo en __str__, es decir,
+    como mucho una vez al volcar el log, no en el camino caliente.
+    """
+    source: str
+    target: str
+    requested_m3: float
+    target_current_m3: float
+    target_max_m3: float
+    allowed_m3: float
+    discarded_m3: float
+
+    def __str__(self) -> str:
+        remaining = max(self.target_max_m3 - self.target_current_m3, 0.0)
+        return (
+            f"[TRANSFER CAPACITY] {self.source} -> {self.target} | "
+            f"requested={self.requested_m3:.8f} m3 | "
+            f"target_current={self.target_current_m3:.8f} m3 | "
+            f"target_max={self.target_max_m3:.8f} m3 | "
+            f"target_remaining={remaining:.8f} m3 | "
+            f"allowed={self.allowed_m3:.8f} m3\n"
+            f"[TRANSFER RESULT] {self.source} -> {self.target} | "
+            f"transferred={self.allowed_m3:.8f} m3 | "
+            f"DISCARDED={self.discarded_m3:.8f} m3"
+        )
+
+    def __iter__(self):
+        # Compatibilidad con el antiguo retorno (transferred, discarded)
+        yield self.allowed_m3
+        yield self.discarded_m3
+
 
 def get_transfer_volume(
     ponds_file: Path,
@@ -13,19 +100,18 @@ def get_transfer_volume(
     source_pond: str | None = None
 ) -> float:
     """Devuelve cuánto cabe en la balsa destino (sin detener el programa)."""
-    df = pd.read_csv(ponds_file, sep="\t")
-    df = df.set_index(df.columns[0])
+    caps = _pond_capacities(ponds_file)
 
-    if target_pond not in df.index:
+    if target_pond not in caps:
         raise ValueError(f"Target pond '{target_pond}' not found in {ponds_file}")
 
-    max_capacity_m3 = float(df.loc[target_pond, "m3"])
+    max_capacity_m3 = caps[target_pond]
     remaining_capacity_m3 = max(max_capacity_m3 - float(target_current_m3), 0.0)
 
     allowed_m3 = min(float(requested_volume_m3), remaining_capacity_m3)
 
     src = source_pond if source_pond is not None else "source"
-    print(
+    _log(
         f"[TRANSFER CAPACITY] {src} -> {target_pond} | "
         f"requested={requested_volume_m3:.8f} m3 | "
         f"target_current={target_current_m3:.8f} m3 | "
@@ -42,29 +128,30 @@ def cap_and_transfer(
     target_pond: str,
     requested_volume_m3: float,
     target_current_m3: float = 0.0
-) -> tuple[float, float]:
+) -> TransferResult:
     """
-    Aplica el tope por capacidad y devuelve:
-      (transferred_m3, discarded_m3)
-    Nunca lanza excepción por falta de capacidad: imprime y continúa.
+    Aplica el tope por capacidad y devuelve un TransferResult (iterable como
+    la antigua tupla (transferred_m3, discarded_m3)).
+    Nunca lanza excepción por falta de capacidad: registra y continúa.
     """
-    allowed = get_transfer_volume(
-        ponds_file=ponds_file,
-        target_pond=target_pond,
-        requested_volume_m3=requested_volume_m3,
-        target_current_m3=target_current_m3,
-        source_pond=source_pond
-    )
-    discarded = max(requested_volume_m3 - allowed, 0.0)
+    caps = _pond_capacities(ponds_file)
+    if target_pond not in caps:
+        raise ValueError(f"Target pond '{target_pond}' not found in {ponds_file}")
 
-    if discarded > 0:
-        print(
-            f"[TRANSFER RESULT] {source_pond} -> {target_pond} | "
-            f"transferred={allowed:.8f} m3 | DISCARDED={discarded:.8f} m3"
-        )
-    else:
-        print(
-            f"[TRANSFER RESULT] {source_pond} -> {target_pond} | "
-            f"transferred={allowed:.8f} m3 | DISCARDED=0.00000000 m3"
-        )
-    return allowed, discarded
+    max_capacity_m3 = float(caps[target_pond])
+    remaining_capacity_m3 = max(max_capacity_m3 - float(target_current_m3), 0.0)
+    allowed = min(float(requested_volume_m3), remaining_capacity_m3)
+    discarded = max(float(requested_volume_m3) - allowed, 0.0)
+
+    result = TransferResult(
+        source=source_pond,
+        target=target_pond,
+        requested_m3=float(requested_volume_m3),
+        target_current_m3=float(target_current_m3),
+        target_max_m3=max_capacity_m3,
+        allowed_m3=allowed,
+        discarded_m3=discarded,
+    )
+    # Al buffer va el registro, no strings: el formateo queda diferido
+    _log(result)
+    return result
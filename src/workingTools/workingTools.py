@@ -13,31 +13,28 @@ class phreeqcModel():
         self.outDict = {}
         self.dfNames = []
         self.dfDict = {}
-        
-    def runModel(self):
-        # Ensure we pass proper string paths and run in the directory of the input file
-        input_path = Path(str(self.inputFile)).resolve()
-        output_path = Path(str(self.outputFile)).resolve()
-        db_path = Path(str(self.phDb)).resolve()
-        bin_path = Path(str(self.phBin)).resolve()
-        cwd = input_path.parent
+        self._cmd_cache = None
 
-        cmd = [str(bin_path), str(input_path), str(output_path), str(db_path)]
-        phProc = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            cwd=str(cwd),
-            text=True,
-        )
+    def runModel(self):
+        # Ensure we pass proper string paths and run in the directory of the input file.
+        # Path resolution is cached: pipelines call runModel many times with the
+        # same four paths, and resolve() stats the filesystem each time.
+        key = (self.phBin, self.inputFile, self.outputFile, self.phDb)
+        if self._cmd_cache is None or self._cmd_cache[0] != key:
+            input_path = Path(str(self.inputFile)).resolve()
+            output_path = Path(str(self.outputFile)).resolve()
+            db_path = Path(str(self.phDb)).resolve()
+            bin_path = Path(str(self.phBin)).resolve()
+            cmd = [str(bin_path), str(input_path), str(output_path), str(db_path)]
+            self._cmd_cache = (key, cmd, str(input_path.parent))
+        _, cmd, cwd = self._cmd_cache
 
-        # Stream stderr for visibility
-        if phProc.stderr is not None:
-            for line in phProc.stderr:
-                print(line.rstrip())
-        ret = phProc.wait()
-        if ret != 0:
-            raise RuntimeError(f"PHREEQC exited with code {ret}. Command: {' '.join(cmd)}")
+        # stderr is inherited so PHREEQC diagnostics reach the console without a
+        # Python-level copy loop; stdout is discarded (it was never read before,
+        # which could deadlock on a full pipe)
+        phProc = subprocess.run(cmd, stdout=subprocess.DEVNULL, cwd=cwd)
+        if phProc.returncode != 0:
+            raise RuntimeError(f"PHREEQC exited with code {phProc.returncode}. Command: {' '.join(cmd)}")
         
     def showSimulations(self,file=None):
         if file==None: